@@ -0,0 +1,82 @@
+import gzip
+import json
+import os
+
+
+class ArchiveStore:
+    def __init__(self, directory="archive"):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.load_manifest()
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                self.segments = json.load(f)
+        except FileNotFoundError:
+            self.segments = []
+
+    def partition(self, found_date):
+        # One partition per month of found_date
+        return found_date[:7]
+
+    def write(self, records):
+        # Another process sharing the directory may have added segments since the last read
+        self.load_manifest()
+        partitions = {}
+        for record in records:
+            partitions.setdefault(self.partition(record["found_date"]), []).append(record)
+
+        for partition, group in sorted(partitions.items()):
+            group.sort(key=lambda record: record["found_date"])
+            relative_path = os.path.join(partition, f"segment-{len(self.segments):06d}.jsonl.gz")
+            path = os.path.join(self.directory, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path + ".tmp", 'wt', encoding='utf-8') as f:
+                for record in group:
+                    f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            os.replace(path + ".tmp", path)
+            self.segments.append({
+                "path": relative_path,
+                "partition": partition,
+                "min_date": group[0]["found_date"],
+                "max_date": group[-1]["found_date"],
+                "count": len(group),
+            })
+        if partitions:
+            self.save_manifest()
+
+    def save_manifest(self):
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.segments, f, indent=4)
+        os.replace(temp_path, self.manifest_path)
+
+    def overlapping_segments(self, start_date=None, end_date=None):
+        for segment in self.segments:
+            if start_date and segment["max_date"] < start_date:
+                continue
+            if end_date and segment["min_date"] > end_date:
+                continue
+            yield segment
+
+    def query(self, search_term="", start_date=None, end_date=None, category_filter=None):
+        search_term = search_term.lower()
+        self.load_manifest()
+        for segment in self.overlapping_segments(start_date, end_date):
+            with gzip.open(os.path.join(self.directory, segment["path"]), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if start_date and record["found_date"] < start_date:
+                        continue
+                    if end_date and record["found_date"] > end_date:
+                        continue
+                    if category_filter and category_filter != record["category"]:
+                        continue
+                    if search_term and search_term not in record["description"].lower():
+                        continue
+                    yield record
+
+    def count(self):
+        self.load_manifest()
+        return sum(segment["count"] for segment in self.segments)
@@ -0,0 +1,62 @@
+import queue
+import threading
+import traceback
+
+POLL_INTERVAL_MS = 50
+
+
+class BackgroundWorker:
+    # Runs jobs one at a time on a worker thread and hands results back to the Tk thread
+    # through root.after, since Tk widgets may only be touched from the thread that created them
+    def __init__(self, root, poll_interval=POLL_INTERVAL_MS):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.generations = {}
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+        self.root.after(self.poll_interval, self.poll)
+
+    def submit(self, func, *args, on_done=None, on_error=None, channel=None):
+        # A newer job on the same channel makes older ones stale: they are skipped if
+        # they have not started yet, and their results are dropped if they have
+        generation = None
+        if channel is not None:
+            generation = self.generations[channel] = self.generations.get(channel, 0) + 1
+        self.jobs.put((func, args, on_done, on_error, channel, generation))
+
+    def is_stale(self, channel, generation):
+        return channel is not None and self.generations.get(channel) != generation
+
+    def work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            func, args, on_done, on_error, channel, generation = job
+            if self.is_stale(channel, generation):
+                continue
+            try:
+                result = func(*args)
+            except Exception as error:
+                if on_error is None:
+                    traceback.print_exc()
+                self.results.put((on_error, error, channel, generation))
+            else:
+                self.results.put((on_done, result, channel, generation))
+
+    def poll(self):
+        while True:
+            try:
+                callback, value, channel, generation = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if callback is not None and not self.is_stale(channel, generation):
+                callback(value)
+        self.root.after(self.poll_interval, self.poll)
+
+    def stop(self):
+        # Lets queued jobs, including pending saves, finish before the thread exits
+        self.jobs.put(None)
+        self.thread.join()
@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from lost_and_found_system import LostAndFoundSystem, RankedIndex
+from storage import JsonStorage, SqliteStorage
+from archive_store import ArchiveStore
+from benchmarks.generator import generate, search_terms, write_dataset
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+SEARCHES_PER_RUN = 50
+VERIFICATIONS_PER_RUN = 30
+IDS_PER_RUN = 1000
+CLAIMS_PER_RUN = 20
+# JsonStorage arguments per JSON backend: "json" is what LostAndFoundSystem and the UI use by
+# default, "json-journal" the journaled files alone
+JSON_BACKENDS = {
+    "json": {"snapshot": True, "shared": True},
+    "json-journal": {},
+}
+BACKENDS = tuple(JSON_BACKENDS) + ("sqlite",)
+
+
+def open_system(directory, backend):
+    archive_store = ArchiveStore(os.path.join(directory, "archive"))
+    if backend == "sqlite":
+        storage = SqliteStorage(os.path.join(directory, "findit.db"))
+    else:
+        storage = JsonStorage(os.path.join(directory, "items.json"), os.path.join(directory, "claimants.json"),
+                              **JSON_BACKENDS[backend])
+    return LostAndFoundSystem(storage=storage, archive_store=archive_store)
+
+
+def prepare(directory, backend, size, seed):
+    os.makedirs(os.path.join(directory, "archive"))
+    if backend == "sqlite":
+        items, claimants = generate(size, seed)
+        SqliteStorage(os.path.join(directory, "findit.db")).import_records(items, claimants)
+    else:
+        items, claimants = write_dataset(directory, size, seed)
+        # The first start writes the snapshot; load_data times the starts after it
+        open_system(directory, backend)
+    claimed = {item["item_id"] for item in items if item["claimed"]}
+    pending_codes = [claimant["claim_code"] for claimant in claimants if claimant["item_id"] not in claimed]
+    return items, pending_codes
+
+
+def file_versions(directory):
+    # A file swapped in by os.replace gets a new inode; one rewritten in place, a new mtime or size
+    return {entry.name: (entry.inode(), entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in os.scandir(directory) if entry.is_file()}
+
+
+def time_runs(func, runs):
+    timings = []
+    for run in range(runs):
+        start = time.perf_counter()
+        func(run)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def result(size, backend, operation, timings, ops_per_run=1, **extra):
+    median = statistics.median(timings)
+    return dict({
+        "size": size,
+        "backend": backend,
+        "operation": operation,
+        "runs": len(timings),
+        "ops_per_run": ops_per_run,
+        "median_s": median,
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "per_op_s": median / ops_per_run,
+    }, **extra)
+
+
+def run_size(size, backend, seed, runs):
+    directory = tempfile.mkdtemp(prefix="findit-bench-")
+    try:
+        items, pending_codes = prepare(directory, backend, size, seed)
+        rng = random.Random(seed + 2)
+        results = []
+
+        loaded = {}
+
+        def load(run):
+            # Drop the previous copy first so runs do not pile up in memory
+            loaded.pop("system", None)
+            loaded["system"] = open_system(directory, backend)
+
+        timings = time_runs(load, runs)
+        system = loaded["system"]
+        tracemalloc.start()
+        open_system(directory, backend)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append(result(size, backend, "load_data", timings, peak_memory_bytes=peak_memory))
+
+        terms = search_terms(SEARCHES_PER_RUN, seed)
+        timings = time_runs(lambda run: [system.verify_ownership(term) for term in terms], runs)
+        results.append(result(size, backend, "verify_ownership", timings, len(terms)))
+
+        # A third of the attempts use the item's own description, a third a reworded one and a third another item's
+        attempts = []
+        for index in range(VERIFICATIONS_PER_RUN):
+            item, other = rng.choice(items), rng.choice(items)
+            description = (item["description"], " ".join(item["description"].split()[:4]), other["description"])[index % 3]
+            attempts.append((item["item_id"], description))
+        timings = time_runs(lambda run: [system.verify_ownership_description(item_id, description, "Bench", "0")
+                                         for item_id, description in attempts], runs)
+        results.append(result(size, backend, "verify_ownership_description", timings, len(attempts)))
+
+        timings = time_runs(lambda run: [system.generate_item_id() for _ in range(IDS_PER_RUN)], runs)
+        results.append(result(size, backend, "generate_item_id", timings, IDS_PER_RUN))
+
+        # Every run claims codes no earlier run used
+        groups = [pending_codes[run * CLAIMS_PER_RUN:(run + 1) * CLAIMS_PER_RUN] for run in range(runs)]
+        if all(groups):
+            timings = time_runs(lambda run: [system.claim_item(code) for code in groups[run]], runs)
+            results.append(result(size, backend, "claim_item", timings, CLAIMS_PER_RUN))
+
+        if backend != "sqlite":
+            before = file_versions(directory)
+            timings = time_runs(lambda run: system.save_data(), runs)
+            # Every file the saves rewrote: the JSON files plus the snapshot, duplicate index
+            # and version file where the backend keeps them
+            after = file_versions(directory)
+            results.append(result(size, backend, "save_data", timings,
+                                  bytes_written=sum(version[2] for name, version in after.items()
+                                                    if before.get(name) != version)))
+
+        # Archiving moves the data it measures, so it runs once and last
+        timings = time_runs(lambda run: system.archive_old_claims(), 1)
+        results.append(result(size, backend, "archive_old_claims", timings, archived=system.archive_store.count()))
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r') as f:
+        baseline = {(entry["size"], entry["backend"], entry["operation"]): entry for entry in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n{'size':>8} {'backend':<12} {'operation':<30} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for entry in results:
+        previous = baseline.get((entry["size"], entry["backend"], entry["operation"]))
+        if previous is None:
+            continue
+        ratio = entry["per_op_s"] / previous["per_op_s"] if previous["per_op_s"] else float("inf")
+        flag = " REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{entry['size']:>8} {entry['backend']:<12} {entry['operation']:<30} "
+              f"{previous['per_op_s'] * 1000:>10.3f}ms {entry['per_op_s'] * 1000:>10.3f}ms {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Lost and Found System on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["json", "sqlite"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for backend in args.backends:
+            for entry in run_size(size, backend, args.seed, args.runs):
+                print(f"{size:>8} {backend:<12} {entry['operation']:<30} {entry['per_op_s'] * 1000:>10.3f}ms per op")
+                results.append(entry)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ranked_search": RankedIndex is not None,
+            "seed": args.seed,
+            "runs": args.runs,
+        },
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Wrote {len(results)} results to {args.output}.")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import json
+import os
+import random
+from datetime import date, timedelta
+
+CATEGORIES = {
+    "Electronics": (("phone", "laptop", "tablet", "charger", "earbuds", "headphones", "calculator", "smartwatch"),
+                    ("Samsung", "Apple", "Lenovo", "Xiaomi", "Casio", "Sony", "Huawei", "Anker")),
+    "Clothing": (("jacket", "hoodie", "cap", "scarf", "sweater", "raincoat", "jersey", "uniform"),
+                 ("Nike", "Adidas", "Uniqlo", "Bench", "Penshoppe", "Zara", "Puma", "Levis")),
+    "Accessories": (("wallet", "umbrella", "watch", "bracelet", "keychain", "eyeglasses", "backpack", "tumbler"),
+                    ("Hydro Flask", "Fossil", "JanSport", "Herschel", "Ray-Ban", "Aquaflask", "Coach", "Seiko")),
+    "Others": (("notebook", "textbook", "id lace", "ballpen", "folder", "water bottle", "lunchbox", "keys"),
+               ("Faber-Castell", "Pilot", "Tupperware", "Moleskine", "Cattleya", "Panda", "Monggol", "HBW")),
+}
+COLORS = ("black", "white", "blue", "red", "green", "gray", "pink", "navy", "brown", "silver", "yellow", "purple")
+DETAILS = ("with a small scratch on the side", "with a sticker on the back", "with initials written inside",
+           "in a clear plastic case", "with a broken strap", "with a keychain attached", "slightly worn out",
+           "with a name tag", "with a cracked corner", "wrapped in a hanky", "with a student ID inside", "brand new")
+LOCATIONS = ("Library", "Cafeteria", "Gym", "Room 101", "Room 204", "Chapel", "Parking Lot", "Main Lobby",
+             "Science Building", "Auditorium", "Canteen", "Registrar", "Covered Court", "Computer Lab")
+END_DATE = date(2025, 12, 31)
+DAYS = 730
+CLAIMED_SHARE = 0.2
+PENDING_SHARE = 0.05
+
+
+def describe(rng, category):
+    nouns, brands = CATEGORIES[category]
+    return f"{rng.choice(COLORS)} {rng.choice(brands)} {rng.choice(nouns)} {rng.choice(DETAILS)}"
+
+
+def generate(count, seed=0):
+    # Same count and seed always give the same dataset; dates spread over the two years up to END_DATE
+    rng = random.Random(seed)
+    categories = list(CATEGORIES)
+    items, claimants = [], []
+    for index in range(count):
+        category = rng.choice(categories)
+        item_id = str(100 + index)
+        found_date = (END_DATE - timedelta(days=rng.randrange(DAYS))).isoformat()
+        roll = rng.random()
+        claimed = roll < CLAIMED_SHARE
+        items.append({
+            "item_id": item_id,
+            "description": describe(rng, category),
+            "location": rng.choice(LOCATIONS),
+            "found_date": found_date,
+            "category": category,
+            "claimed": claimed,
+            "status": "Claimed" if claimed else "Unclaimed",
+        })
+        # Claimed items have the claimant who collected them; some unclaimed items have a code issued but not used
+        # yet, left without an issue time so it is stamped on load and stays claimable
+        if roll < CLAIMED_SHARE + PENDING_SHARE:
+            claimants.append({
+                "item_id": item_id,
+                "claim_code": f"CLAIM-{index:07d}",
+                "name": f"Claimant {index}",
+                "contact": f"09{rng.randrange(10 ** 9):09d}",
+                "issued_at": f"{found_date} 12:00:00" if claimed else None,
+                "state": "collected" if claimed else "pending",
+                "resolved_at": f"{found_date} 12:00:00" if claimed else None,
+            })
+    return items, claimants
+
+
+def search_terms(count, seed=0):
+    rng = random.Random(seed + 1)
+    terms = []
+    for _ in range(count):
+        nouns, brands = CATEGORIES[rng.choice(list(CATEGORIES))]
+        terms.append(rng.choice((rng.choice(nouns), rng.choice(brands).lower(), f"{rng.choice(COLORS)} {rng.choice(nouns)}")))
+    return terms
+
+
+def write_dataset(directory, count, seed=0):
+    items, claimants = generate(count, seed)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "items.json"), 'w') as f:
+        json.dump(items, f, indent=4)
+    with open(os.path.join(directory, "claimants.json"), 'w') as f:
+        json.dump(claimants, f, indent=4)
+    return items, claimants
@@ -0,0 +1,57 @@
+import csv
+import json
+import os
+
+INTAKE_FIELDS = ("description", "location", "found_date", "category")
+EXPORT_FIELDS = ("item_id", "description", "location", "found_date", "category", "claimed", "status")
+
+
+def is_csv(path):
+    return os.path.splitext(path)[1].lower() == ".csv"
+
+
+def text_value(value):
+    # JSONL values may be numbers where text is expected, such as a room number as the location;
+    # those read as their text. None for lists, objects and booleans
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+
+def read_records(path):
+    # Streams one record per row; a JSONL line that does not parse is passed on as its raw
+    # text so the row is still counted and reported by the caller's validation
+    # Spreadsheet exports often start with a byte order mark, which would stick to the first header
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        if is_csv(path):
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line.rstrip("\n")
+
+
+def write_records(path, records, fields=EXPORT_FIELDS):
+    count = 0
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+        if is_csv(path):
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+        else:
+            for record in records:
+                f.write(json.dumps({field: record[field] for field in fields}, separators=(',', ':')) + "\n")
+                count += 1
+    os.replace(temp_path, path)
+    return count
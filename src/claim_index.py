@@ -0,0 +1,71 @@
+import heapq
+from bisect import bisect_left
+from datetime import datetime
+from secondary_index import DateIndex
+
+CLAIM_STATES = ("pending", "collected", "expired")
+# Sorts in time order as text, so it can key the indexes
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def timestamp(moment=None):
+    return (moment or datetime.now()).strftime(TIMESTAMP_FORMAT)
+
+
+class ClaimIndex:
+    # Claim codes of each state in issue order, for paging, the pending ones in a heap ordered
+    # by issue time and the expired ones by expiry time, so the sweeper only looks at codes that are due
+    def __init__(self):
+        self.by_state = {state: DateIndex() for state in CLAIM_STATES}
+        self.pending_heap = []
+        self.expired_by_resolution = DateIndex()
+        self.bulk = False
+
+    def begin_bulk(self):
+        self.bulk = True
+        for index in self.indexes():
+            index.bulk = True
+
+    def finish_bulk(self):
+        for index in self.indexes():
+            index.finish_bulk()
+        heapq.heapify(self.pending_heap)
+        self.bulk = False
+
+    def indexes(self):
+        return list(self.by_state.values()) + [self.expired_by_resolution]
+
+    def add(self, claimant):
+        self.by_state[claimant.state].add(claimant.issued_at, claimant.claim_code)
+        if claimant.state == "expired":
+            self.expired_by_resolution.add(claimant.resolved_at or claimant.issued_at, claimant.claim_code)
+        if claimant.state == "pending":
+            if self.bulk:
+                self.pending_heap.append((claimant.issued_at, claimant.claim_code))
+            else:
+                heapq.heappush(self.pending_heap, (claimant.issued_at, claimant.claim_code))
+
+    def remove(self, claimant):
+        # Resolved codes stay in the heap until they reach the top; pop_due's caller skips them
+        self.by_state[claimant.state].remove(claimant.issued_at, claimant.claim_code)
+        if claimant.state == "expired":
+            self.expired_by_resolution.remove(claimant.resolved_at or claimant.issued_at, claimant.claim_code)
+
+    def pop_due(self, issued_before):
+        due = []
+        while self.pending_heap and self.pending_heap[0][0] < issued_before:
+            due.append(heapq.heappop(self.pending_heap)[1])
+        return due
+
+    def expired_before(self, resolved_before):
+        entries = self.expired_by_resolution.entries
+        return [claim_code for resolved_at, claim_code in entries[:bisect_left(entries, (resolved_before,))]]
+
+    def count(self, state):
+        return len(self.by_state[state])
+
+    def page(self, state, offset, limit):
+        # Newest first
+        entries = self.by_state[state].entries
+        end = max(0, len(entries) - offset)
+        return [claim_code for issued_at, claim_code in reversed(entries[max(0, end - limit):end])]
@@ -0,0 +1,193 @@
+import json
+import os
+import zlib
+from array import array
+from datetime import date
+from search_index import normalize, token_grams
+
+ROWS_PER_BAND = 3
+BANDS = 16
+NUM_BINS = ROWS_PER_BAND * BANDS
+# Reports are compared with items found within this many days of them
+DUPLICATE_DAYS = 7
+WINDOW_DAYS = 7
+# Share of description trigrams two reports must have in common to be flagged
+DUPLICATE_THRESHOLD = 0.5
+# Spreads CRC values, which are linear in their input, before they are split into bin and value
+MULTIPLIER = 0x9E3779B1
+NO_WINDOW = -1
+
+
+def signature(text):
+    # One permutation MinHash over the description's trigrams: each trigram's hash picks a bin
+    # and each bin keeps the smallest value it sees. None when the text has no trigram
+    bins = [None] * NUM_BINS
+    for gram in token_grams(normalize(text)):
+        hashed = zlib.crc32(gram.encode()) * MULTIPLIER & 0xFFFFFFFF
+        index, value = hashed % NUM_BINS, hashed // NUM_BINS
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    if all(value is None for value in bins):
+        return None
+    # An empty bin borrows the next filled bin's value, shifted by the distance, so two
+    # signatures only agree there when they borrowed alike
+    values = array('I', bytes(4 * NUM_BINS))
+    for index in range(NUM_BINS):
+        distance = 0
+        while bins[(index + distance) % NUM_BINS] is None:
+            distance += 1
+        values[index] = bins[(index + distance) % NUM_BINS] + distance * (2 ** 32 // NUM_BINS)
+    return values
+
+
+def band_keys(values):
+    # Two signatures share a band key when all rows of that band agree
+    return [band << 32 | zlib.crc32(values[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+            for band in range(BANDS)]
+
+
+def day_number(found_date):
+    try:
+        return date.fromisoformat(found_date).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def date_window(found_date):
+    day = day_number(found_date)
+    return NO_WINDOW if day is None else day // WINDOW_DAYS
+
+
+def nearby_windows(found_date):
+    # Windows holding every date within DUPLICATE_DAYS of found_date
+    day = day_number(found_date)
+    if day is None:
+        return [NO_WINDOW]
+    return list(range((day - DUPLICATE_DAYS) // WINDOW_DAYS, (day + DUPLICATE_DAYS) // WINDOW_DAYS + 1))
+
+
+def similarity(a, b):
+    grams_a, grams_b = token_grams(normalize(a)), token_grams(normalize(b))
+    union = len(grams_a | grams_b)
+    return len(grams_a & grams_b) / union if union else 0.0
+
+
+class DuplicateIndex:
+    # LSH band keys of the unclaimed items, grouped by category and found_date window. A group's
+    # buckets are only built once a report looks at it, so the index costs little until used
+    def __init__(self, saved=None):
+        self.groups = {}
+        self.buckets = {}
+        self.locations = {}
+        # A saved index is parsed on first use; changes made before then wait in order
+        self.saved = saved
+        self.queued = []
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.locations)
+
+    def add(self, item):
+        if self.saved is not None:
+            self.queued.append((item, None))
+            return
+        values = signature(item.description)
+        if values is not None:
+            self.add_keys(item.item_id, (item.category, date_window(item.found_date)), array('Q', band_keys(values)))
+        else:
+            self.remove(item.item_id)
+
+    def add_keys(self, item_id, group, keys):
+        if item_id in self.locations:
+            self.remove(item_id)
+        self.locations[item_id] = group
+        self.groups.setdefault(group, {})[item_id] = keys
+        buckets = self.buckets.get(group)
+        if buckets is not None:
+            for key in keys:
+                buckets.setdefault(key, []).append(item_id)
+
+    def remove(self, item_id):
+        if self.saved is not None:
+            self.queued.append((None, item_id))
+            return
+        group = self.locations.pop(item_id, None)
+        if group is None:
+            return
+        members = self.groups[group]
+        keys = members.pop(item_id)
+        if not members:
+            del self.groups[group]
+        buckets = self.buckets.get(group)
+        if buckets is not None:
+            for key in keys:
+                bucket = buckets[key]
+                bucket.remove(item_id)
+                if not bucket:
+                    del buckets[key]
+            if not members:
+                del self.buckets[group]
+
+    def ensure_loaded(self):
+        if self.saved is None:
+            return
+        (listing, data), self.saved = self.saved, None
+        listing = json.loads(listing)
+        keys = array('Q')
+        keys.frombytes(data)
+        for index, (item_id, group) in enumerate(zip(listing["item_ids"], listing["groups"])):
+            self.add_keys(item_id, tuple(group), keys[index * BANDS:(index + 1) * BANDS])
+        queued, self.queued = self.queued, []
+        for item, item_id in queued:
+            if item is not None:
+                self.add(item)
+            else:
+                self.remove(item_id)
+
+    def group_buckets(self, group):
+        buckets = self.buckets.get(group)
+        if buckets is None:
+            buckets = {}
+            for item_id, keys in self.groups.get(group, {}).items():
+                for key in keys:
+                    buckets.setdefault(key, []).append(item_id)
+            if group in self.groups:
+                self.buckets[group] = buckets
+        return buckets
+
+    def candidates(self, category, found_date, keys):
+        self.ensure_loaded()
+        found = set()
+        for window in nearby_windows(found_date):
+            buckets = self.group_buckets((category, window))
+            for key in keys:
+                found.update(buckets.get(key, ()))
+        return found
+
+    def save(self, path, item_count):
+        # A short header line, a line naming the items and their groups, then their band keys as one packed array
+        self.ensure_loaded()
+        item_ids = list(self.locations)
+        header = {"bands": BANDS, "rows": ROWS_PER_BAND, "item_count": item_count}
+        listing = {"item_ids": item_ids, "groups": [self.locations[item_id] for item_id in item_ids]}
+        keys = array('Q')
+        for item_id in item_ids:
+            keys.extend(self.groups[self.locations[item_id]][item_id])
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(json.dumps(listing, separators=(',', ':')).encode() + b"\n")
+            f.write(keys.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+def open_saved(path, item_count):
+    # Only the header is parsed here; the rest waits for the first report. The index is None if the
+    # file was saved for a different number of items or with other LSH settings
+    with open(path, 'rb') as f:
+        header = json.loads(f.readline())
+        if header["bands"] != BANDS or header["rows"] != ROWS_PER_BAND or header["item_count"] != item_count:
+            return None
+        return DuplicateIndex((f.readline(), f.read()))
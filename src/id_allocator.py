@@ -0,0 +1,67 @@
+import random
+import time
+
+
+class SequenceAllocator:
+    def __init__(self, start=100, prefix=""):
+        self.prefix = prefix
+        self.next_value = start
+
+    def observe(self, value):
+        number = value[len(self.prefix):] if value.startswith(self.prefix) else ""
+        if number.isdigit():
+            self.next_value = max(self.next_value, int(number) + 1)
+
+    def allocate(self):
+        value = self.next_value
+        self.next_value += 1
+        return f"{self.prefix}{value}"
+
+    def allocate_many(self, count):
+        first = self.next_value
+        self.next_value += count
+        return [f"{self.prefix}{value}" for value in range(first, first + count)]
+
+
+class ShardedAllocator(SequenceAllocator):
+    # Each node draws from its own sequence so kiosks never hand out the same ID
+    def __init__(self, node_id, start=1):
+        super().__init__(start=start, prefix=f"{node_id}-")
+
+
+class TimeOrderedAllocator:
+    def __init__(self):
+        self.last_value = 0
+
+    def observe(self, value):
+        if value.isdigit():
+            self.last_value = max(self.last_value, int(value))
+
+    def allocate(self):
+        self.last_value = max(int(time.time() * 1000), self.last_value + 1)
+        return str(self.last_value)
+
+    def allocate_many(self, count):
+        first = max(int(time.time() * 1000), self.last_value + 1)
+        self.last_value = first + count - 1
+        return [str(value) for value in range(first, first + count)]
+
+
+class RandomCodeAllocator:
+    def __init__(self, prefix="CLAIM-", digits=4):
+        self.prefix = prefix
+        self.digits = digits
+        self.used = set()
+
+    def observe(self, value):
+        self.used.add(value)
+
+    def allocate(self):
+        # Widen the code space before it is half full so a draw needs two attempts on average
+        while len(self.used) * 2 >= 9 * 10 ** (self.digits - 1):
+            self.digits += 1
+        while True:
+            code = f"{self.prefix}{random.randint(10 ** (self.digits - 1), 10 ** self.digits - 1)}"
+            if code not in self.used:
+                self.used.add(code)
+                return code
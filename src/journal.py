@@ -0,0 +1,95 @@
+import json
+import os
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self.offset = 0
+        self.file = None
+
+    def append(self, op, data, durable=True):
+        # A non-durable append reaches the OS but waits for the next sync() to reach the disk
+        line = json.dumps({"op": op, "data": data}, separators=(',', ':')) + "\n"
+        if self.file is None:
+            # No newline translation, so offsets count the bytes actually written
+            self.file = open(self.path, 'a', newline='')
+        self.file.write(line)
+        self.file.flush()
+        if durable:
+            os.fsync(self.file.fileno())
+        self.records += 1
+        self.offset += len(line)
+        return len(line)
+
+    def replay(self):
+        # Another process may have replaced the file since it was opened for appending
+        self.close()
+        try:
+            with open(self.path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        valid_length = 0
+        for line in content.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            entries.append((entry["op"], entry["data"]))
+            valid_length += len(line)
+
+        if valid_length < len(content):
+            # Drop a torn record left behind by a crash so new appends start on a clean line
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_length)
+        self.records = len(entries)
+        self.offset = valid_length
+        return entries
+
+    def read_new(self):
+        # Records appended since the last replay, read_new or append, by this or any other process
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                content = f.read()
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for line in content.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            entry = json.loads(line)
+            entries.append((entry["op"], entry["data"]))
+            self.offset += len(line)
+        self.records += len(entries)
+        return entries
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def sync(self):
+        if self.file is not None:
+            os.fsync(self.file.fileno())
+
+    def truncate(self):
+        # Truncated in place rather than removed: other processes may hold it open for appending
+        if os.path.exists(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(0)
+        self.records = 0
+        self.offset = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -1,64 +1,456 @@
+import argparse
 import json
-import os
+import sys
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import hashlib
-import random
-from difflib import SequenceMatcher
+from search_index import SearchIndex, normalize
+from matching import DescriptionMatcher
+from secondary_index import SecondaryIndex
+from claim_index import CLAIM_STATES, ClaimIndex, timestamp
+from storage import JsonStorage, SqliteStorage
+from archive_store import ArchiveStore
+from snapshot import SnapshotReader, LazyItems
+from id_allocator import SequenceAllocator, RandomCodeAllocator
+from bulk_io import INTAKE_FIELDS, read_records, text_value, write_records
+from metrics import Metrics, write_report
+from reconcile import DEFAULT_TOP_N, reconcile
+from duplicate_index import (DuplicateIndex, DUPLICATE_DAYS, DUPLICATE_THRESHOLD, signature, band_keys, day_number,
+                             nearby_windows, similarity)
+
+try:
+    from ranked_search import RankedIndex
+except ImportError:
+    RankedIndex = None
+
+# A claim code has to be used within this long of being issued
+CLAIM_TTL = timedelta(days=7)
+# Expired codes stay visible to admins this long before the sweeper removes them
+EXPIRED_RETENTION = timedelta(days=30)
+SWEEP_INTERVAL = timedelta(hours=1)
+CLAIMS_PAGE_SIZE = 20
+CLAIM_SUCCESS = "Item claimed successfully!"
+CLAIM_EXPIRED = "This claim code has expired. Please verify ownership again."
+DUPLICATE_LIMIT = 5
 
 
 class Item:
+    __slots__ = ("item_id", "description", "location", "found_date", "category", "claimed", "status")
+
     def __init__(self, item_id, description, location, found_date, category, claimed=False, status="Unclaimed"):
         self.item_id = item_id
         self.description = description
-        self.location = location
-        self.found_date = found_date
-        self.category = category
+        # Locations, dates, categories and statuses repeat across records, so share one copy of each
+        self.location = sys.intern(location)
+        self.found_date = sys.intern(found_date)
+        self.category = sys.intern(category)
         self.claimed = claimed
-        self.status = status
+        self.status = sys.intern(status)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
 
 
 class Claimant:
-    def __init__(self, item_id, claim_code, name, contact):
+    __slots__ = ("item_id", "claim_code", "name", "contact", "issued_at", "state", "resolved_at")
+
+    def __init__(self, item_id, claim_code, name, contact, issued_at=None, state="pending", resolved_at=None):
         self.item_id = item_id
         self.claim_code = claim_code
         self.name = name
         self.contact = contact
+        # Codes saved before issue times were recorded get theirs when loaded
+        self.issued_at = issued_at
+        self.state = sys.intern(state)
+        self.resolved_at = resolved_at
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
 
 
 class LostAndFoundSystem:
-    def __init__(self):
-        self.items_file = "items.json"
-        self.claimants_file = "claimants.json"
-        self.items = []
-        self.claimants = []
-        self.load_data()
+    def __init__(self, storage=None, id_allocator=None, claim_code_allocator=None, archive_store=None, metrics=None):
+        # By default every process opening the JSON files shares them safely: the CLI, serve and kiosks alike
+        self.storage = storage or JsonStorage(snapshot=True, shared=True)
+        self.archive_store = archive_store or ArchiveStore()
+        self.id_allocator = id_allocator or SequenceAllocator()
+        self.claim_code_allocator = claim_code_allocator or RandomCodeAllocator()
+        self.items = {}
+        self.claimants = {}
+        self.claimants_by_item = {}
+        self.claim_index = ClaimIndex()
+        self.search_index = SearchIndex()
+        self.matcher = DescriptionMatcher()
+        self.secondary_index = SecondaryIndex()
+        self.ranked_index = None
+        self.duplicate_index = None
+        self.loaded_item_count = 0
+        self.indexes_ready = False
+        self.batch_depth = 0
+        self.save_pending = False
+        self.next_sweep = datetime.now()
+        # Without metrics nothing is wrapped, so the operations run at full speed
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.attach(self)
+        with self.storage.lock():
+            self.load_data()
         self.admin_password = hashlib.sha256("admin123".encode()).hexdigest()
 
     def load_data(self):
-        try:
-            with open(self.items_file, 'r') as f:
-                items_data = json.load(f)
-                self.items = [Item(**item) for item in items_data]
-        except FileNotFoundError:
-            print("No items data found.")
+        if self.storage.queryable:
+            # Records stay in the database; only seed the allocators
+            for item_id in self.storage.item_ids():
+                self.id_allocator.observe(item_id)
+            for claim_code in self.storage.claim_codes():
+                self.claim_code_allocator.observe(claim_code)
+            return
 
-        try:
-            with open(self.claimants_file, 'r') as f:
-                self.claimants = json.load(f)
-        except FileNotFoundError:
-            print("No claimants data found.")
+        items_data, claimants_data, changes = self.storage.load()
+        self.indexes_ready = False
+        self.duplicate_index = None
+        previous_items = self.items
+        # Either way the search indexes wait for the first query that needs them
+        if isinstance(items_data, SnapshotReader):
+            # Items are built from the snapshot as they are touched
+            self.items = LazyItems(items_data, Item)
+        else:
+            self.items = {item["item_id"]: Item(**item) for item in items_data}
+        for item_id in self.items:
+            self.id_allocator.observe(item_id)
+        if isinstance(previous_items, LazyItems):
+            # Windows cannot replace a file that is still mapped, so other processes' saves need it released
+            previous_items.reader.close()
+        # Without a current saved copy the duplicate index waits for the first report that needs it.
+        # A saved copy describes the loaded files; the journal replayed below brings it up to date
+        self.loaded_item_count = len(self.items)
+        self.duplicate_index = self.storage.load_duplicates(self.loaded_item_count)
+
+        self.claimants = {}
+        self.claimants_by_item = {}
+        self.claim_index = ClaimIndex()
+        self.claim_index.begin_bulk()
+        for claimant_data in claimants_data:
+            claimant = Claimant(**claimant_data)
+            self.claimants[claimant.claim_code] = claimant
+            self.index_claimant(claimant)
+        self.claim_index.finish_bulk()
+
+        for op, data in changes:
+            self.apply_change(op, data)
+        if not isinstance(items_data, SnapshotReader):
+            # Start from a snapshot next time
+            self.storage.ensure_snapshot(*self.snapshot())
+
+    def build_item_indexes(self):
+        self.search_index = SearchIndex()
+        self.matcher = DescriptionMatcher()
+        self.secondary_index = SecondaryIndex()
+        # Built by the first ranked search; most sessions never rank
+        self.ranked_index = None
+        self.indexes_ready = True
+        self.secondary_index.begin_bulk()
+        for item in self.items.values():
+            self.index_item(item)
+        self.secondary_index.finish_bulk()
+        if isinstance(self.items, LazyItems):
+            # Indexing built every item, so the mapped snapshot is no longer needed
+            self.items = self.items.detach()
+
+    def ensure_indexes(self):
+        if not self.indexes_ready and not self.storage.queryable:
+            self.build_item_indexes()
+
+    def ensure_ranked_index(self):
+        self.ensure_indexes()
+        if self.ranked_index is None:
+            # Same items, in the same order, as the substring index, whose texts are already normalized
+            ranked_index = RankedIndex()
+            for item_id, row in self.search_index.order.items():
+                ranked_index.add(item_id, self.search_index.row_texts[row])
+            ranked_index.compact()
+            self.ranked_index = ranked_index
+
+    def index_item(self, item):
+        self.id_allocator.observe(item.item_id)
+        if not self.indexes_ready:
+            return
+        # Normalize once; the search index shares the matcher's copy of the text
+        text = normalize(item.description)
+        self.matcher.add(item.item_id, text)
+        self.secondary_index.add(item)
+        if not item.claimed:
+            self.search_index.add(item, text)
+            if self.ranked_index is not None:
+                self.ranked_index.add(item.item_id, text)
+
+    def unindex_unclaimed(self, item):
+        if not self.indexes_ready:
+            return
+        self.search_index.remove(item.item_id)
+        if self.ranked_index is not None and item.item_id in self.matcher:
+            self.ranked_index.remove(item.item_id, self.matcher.get_text(item.item_id))
+
+    def index_claimed(self, item):
+        if self.indexes_ready:
+            self.unindex_unclaimed(item)
+            self.secondary_index.mark_claimed(item)
+
+    def unindex_item(self, item):
+        if not self.indexes_ready:
+            return
+        self.unindex_unclaimed(item)
+        self.secondary_index.remove(item)
+        self.matcher.remove(item.item_id)
+
+    def ensure_duplicate_index(self):
+        while self.duplicate_index is None:
+            duplicate_index = self.duplicate_index = DuplicateIndex()
+            for item in self.items.values():
+                if not item.claimed:
+                    duplicate_index.add(item)
+            # Saved so later starts skip the build. Replaying the journal over it again is harmless,
+            # but it must not outlive the loaded files: a reload for another process's full save drops it
+            with self.storage.lock():
+                self.catch_up()
+                if self.duplicate_index is duplicate_index:
+                    self.storage.save_duplicates(duplicate_index, self.loaded_item_count)
+
+    def index_claimant(self, claimant):
+        self.claim_code_allocator.observe(claimant.claim_code)
+        if claimant.issued_at is None:
+            claimant.issued_at = timestamp()
+        self.claimants_by_item.setdefault(claimant.item_id, []).append(claimant)
+        self.claim_index.add(claimant)
+
+    def unindex_claimant(self, claimant):
+        self.claim_index.remove(claimant)
+        claimants = self.claimants_by_item.get(claimant.item_id, [])
+        if claimant in claimants:
+            claimants.remove(claimant)
+        if not claimants:
+            self.claimants_by_item.pop(claimant.item_id, None)
+
+    def set_claim_state(self, claimant, state, resolved_at):
+        self.claim_index.remove(claimant)
+        claimant.state = state
+        claimant.resolved_at = resolved_at
+        self.claim_index.add(claimant)
+
+    def apply_change(self, op, data):
+        # Replayed changes must be idempotent: a crash between a checkpoint and the
+        # journal truncation replays records that are already in the snapshot
+        if op == "add_item":
+            if data["item_id"] in self.items:
+                self.unindex_item(self.items[data["item_id"]])
+            item = Item(**data)
+            self.items[item.item_id] = item
+            self.index_item(item)
+            if self.duplicate_index is not None:
+                if item.claimed:
+                    self.duplicate_index.remove(item.item_id)
+                else:
+                    self.duplicate_index.add(item)
+        elif op == "add_items":
+            for record in data["items"]:
+                self.apply_change("add_item", record)
+        elif op == "claim_item":
+            item = self.items.get(data["item_id"])
+            if item:
+                item.claimed = True
+                item.status = "Claimed"
+                self.index_claimed(item)
+                if self.duplicate_index is not None:
+                    self.duplicate_index.remove(item.item_id)
+            if data.get("claim_code"):
+                # The code used is collected; the item's other pending codes can never be used now
+                for claimant in self.claimants_by_item.get(data["item_id"], []):
+                    if claimant.state == "pending":
+                        state = "collected" if claimant.claim_code == data["claim_code"] else "expired"
+                        self.set_claim_state(claimant, state, data["claimed_at"])
+        elif op == "expire_claims":
+            for claim_code in data["claim_codes"]:
+                claimant = self.claimants.get(claim_code)
+                if claimant and claimant.state == "pending":
+                    self.set_claim_state(claimant, "expired", data["expired_at"])
+        elif op == "purge_claims":
+            for claim_code in data["claim_codes"]:
+                claimant = self.claimants.pop(claim_code, None)
+                if claimant:
+                    self.unindex_claimant(claimant)
+        elif op == "add_claimant":
+            if data["claim_code"] not in self.claimants:
+                claimant = Claimant(**data)
+                self.claimants[claimant.claim_code] = claimant
+                self.index_claimant(claimant)
+        elif op == "archive_items":
+            for item_id in data["item_ids"]:
+                item = self.items.pop(item_id, None)
+                if item:
+                    self.unindex_item(item)
+                    if self.duplicate_index is not None:
+                        self.duplicate_index.remove(item_id)
+                # Claimants travel to the archive with their item
+                for claimant in self.claimants_by_item.pop(item_id, []):
+                    self.claimants.pop(claimant.claim_code, None)
+                    self.claim_index.remove(claimant)
+
+    def get_item(self, item_id):
+        if self.storage.queryable:
+            record = self.storage.get_item(str(item_id))
+            return Item(**record) if record else None
+        return self.items.get(str(item_id))
+
+    def get_claimant(self, claim_code):
+        if self.storage.queryable:
+            record = self.storage.get_claimant(claim_code)
+            return Claimant(**record) if record else None
+        return self.claimants.get(claim_code)
+
+    def get_claimants_for_item(self, item_id):
+        if self.storage.queryable:
+            return [Claimant(**record) for record in self.storage.claimants_for_item(str(item_id))]
+        return self.claimants_by_item.get(str(item_id), [])
+
+    def get_items(self, item_ids):
+        if self.storage.queryable:
+            return [Item(**record) for record in self.storage.get_items(item_ids)]
+        items = (self.items.get(item_id) for item_id in item_ids)
+        return [item for item in items if item is not None]
+
+    def get_claimants(self, claim_codes):
+        if self.storage.queryable:
+            return [Claimant(**record) for record in self.storage.get_claimants(claim_codes)]
+        claimants = (self.claimants.get(claim_code) for claim_code in claim_codes)
+        return [claimant for claimant in claimants if claimant is not None]
+
+    def list_claim_codes(self):
+        if self.storage.queryable:
+            return list(self.storage.claim_codes())
+        return list(self.claimants)
+
+    def list_claims(self, state, offset=0, limit=100):
+        # One page of the claims in a state, newest first
+        if self.storage.queryable:
+            return [Claimant(**record) for record in self.storage.claims_page(state, offset, limit)]
+        return self.get_claimants(self.claim_index.page(state, offset, limit))
+
+    def count_claims(self, state):
+        if self.storage.queryable:
+            return self.storage.count_claims(state)
+        return self.claim_index.count(state)
+
+    def list_claimants(self):
+        if self.storage.queryable:
+            return [Claimant(**record) for record in self.storage.iter_claimants()]
+        return list(self.claimants.values())
+
+    def snapshot(self):
+        if self.storage.queryable:
+            return list(self.storage.iter_items()), list(self.storage.iter_claimants())
+        return [item.to_dict() for item in self.items.values()], [claimant.to_dict() for claimant in self.claimants.values()]
 
     def save_data(self):
-        with open(self.items_file, 'w') as f:
-            json.dump([vars(item) for item in self.items], f, indent=4)
-        with open(self.claimants_file, 'w') as f:
-            json.dump(self.claimants, f, indent=4)
+        if self.storage.queryable:
+            return
+        with self.storage.lock():
+            # Never write out a copy that is missing another process's changes
+            self.catch_up()
+            items, claimants = self.snapshot()
+            if isinstance(self.items, LazyItems):
+                # Every item is built by now; release the mapped snapshot before it is rewritten
+                self.items = self.items.detach()
+            self.storage.save(items, claimants, self.duplicate_index)
+            self.save_pending = False
+
+    def catch_up(self):
+        # Callers hold the storage lock
+        changes = self.storage.changes()
+        if changes is None:
+            # Another process folded the journal into new files
+            self.load_data()
+            return
+        for op, data in changes:
+            self.apply_change(op, data)
+
+    def sync(self):
+        # Picks up changes other processes sharing the storage have made and runs the claim sweeper when it is
+        # due; returns whether there were any changes
+        changed = self.storage.has_changes()
+        if changed and not self.storage.queryable:
+            with self.storage.lock():
+                self.catch_up()
+        if datetime.now() >= self.next_sweep:
+            self.expire_claims()
+        return changed
+
+    def resolve_conflicts(self, op, data):
+        # Runs under the storage lock after catching up, so it sees every other process's changes.
+        # IDs and codes taken in the meantime are replaced; a claim that lost the race is refused
+        if op in ("add_item", "add_items"):
+            records = data["items"] if op == "add_items" else [data]
+            taken = {item.item_id for item in self.get_items([record["item_id"] for record in records])}
+            for record in records:
+                if record["item_id"] in taken:
+                    record["item_id"] = self.generate_item_id()
+        elif op == "add_claimant":
+            while self.get_claimant(data["claim_code"]):
+                data["claim_code"] = self.claim_code_allocator.allocate()
+        elif op == "claim_item":
+            item = self.get_item(data["item_id"])
+            if data.get("claim_code"):
+                claimant = self.get_claimant(data["claim_code"])
+                if claimant is None or claimant.state != "pending":
+                    return False
+            return item is not None and not item.claimed
+        elif op in ("expire_claims", "purge_claims"):
+            # Drop codes another process collected or removed in the meantime
+            state = "pending" if op == "expire_claims" else "expired"
+            data["claim_codes"] = [claimant.claim_code for claimant in self.get_claimants(data["claim_codes"])
+                                   if claimant.state == state]
+            return bool(data["claim_codes"])
+        return True
+
+    def commit(self, op, data):
+        # Returns False when another process's change makes this one invalid
+        with self.storage.lock():
+            self.catch_up()
+            if not self.resolve_conflicts(op, data):
+                return False
+            # In-memory state changes through the same records that are persisted
+            if not self.storage.queryable:
+                self.apply_change(op, data)
+            # Inside a batch the record is made durable, and any full save written, when the batch ends
+            if self.storage.record(op, data, durable=not self.batch_depth):
+                self.save_pending = True
+            if self.save_pending and not self.batch_depth:
+                self.save_data()
+        return True
+
+    @contextmanager
+    def batch(self):
+        # Changes committed inside share one lock acquisition and one durable write (group commit)
+        with self.storage.lock():
+            self.batch_depth += 1
+            try:
+                yield
+            finally:
+                self.batch_depth -= 1
+                if not self.batch_depth:
+                    self.storage.flush()
+                    if self.save_pending:
+                        self.save_data()
 
     def generate_item_id(self):
-        while True:
-            item_id = str(random.randint(100, 999))
-            if not any(item.item_id == item_id for item in self.items):
-                return item_id
+        item_id = self.id_allocator.allocate()
+        while self.get_item(item_id):
+            item_id = self.id_allocator.allocate()
+        return item_id
+
+    def generate_item_ids(self, count):
+        item_ids = self.id_allocator.allocate_many(count)
+        taken = {item.item_id for item in self.get_items(item_ids)}
+        return [self.generate_item_id() if item_id in taken else item_id for item_id in item_ids]
 
     def validate_description(self, description):
         if not description.strip():
@@ -67,61 +459,226 @@ class LostAndFoundSystem:
             return "Description must be at least 3 words."
         return None
 
-    def report_lost_item(self, description, location, found_date, category):
+    def report_lost_item(self, description, location, found_date, category, check_duplicates=True):
+        # Callers that already asked find_duplicates, and had the report confirmed, skip the second check
         validation_error = self.validate_description(description)
         if validation_error:
             return validation_error
-        item_id = self.generate_item_id()
-        new_item = Item(item_id, description, location, found_date, category)
-        self.items.append(new_item)
-        self.save_data()
+        duplicates = self.find_duplicates(description, found_date, category) if check_duplicates else []
+        new_item = Item(self.generate_item_id(), description, location, found_date, category)
+        item_id = self.add_item(new_item)
+        if duplicates:
+            return (f"Item reported successfully with ID: {item_id}. "
+                    f"Possible duplicate of item(s): {', '.join(item.item_id for item in duplicates)}")
         return f"Item reported successfully with ID: {item_id}"
 
-    def verify_ownership(self, search_term, category_filter=None, date_filter=None):
-        results = []
-        for item in self.items:
-            if item.claimed:  # Exclude claimed items
-                continue
-            if search_term and search_term not in item.description.lower():
-                continue
-            if category_filter and category_filter != item.category:
+    def find_duplicates(self, description, found_date, category, limit=DUPLICATE_LIMIT):
+        # Unclaimed items in the same category, found within DUPLICATE_DAYS, whose descriptions share most
+        # of their trigrams with this one. The LSH buckets narrow this to a few candidates to compare
+        values = signature(description)
+        if values is None:
+            return []
+        keys = band_keys(values)
+        if self.storage.queryable:
+            candidate_ids = self.storage.duplicate_candidates(category, nearby_windows(found_date), keys)
+        else:
+            self.ensure_duplicate_index()
+            candidate_ids = self.duplicate_index.candidates(category, found_date, keys)
+        day = day_number(found_date)
+        scored = []
+        for item in self.get_items(list(candidate_ids)):
+            other_day = day_number(item.found_date)
+            if day is not None and other_day is not None and abs(day - other_day) > DUPLICATE_DAYS:
                 continue
-            if date_filter and date_filter != item.found_date:
+            score = similarity(description, item.description)
+            if score >= DUPLICATE_THRESHOLD:
+                scored.append((score, item))
+        scored.sort(key=lambda entry: entry[0], reverse=True)
+        return [item for score, item in scored[:limit]]
+
+    def validate_record(self, record):
+        if not isinstance(record, dict):
+            return "Row could not be read as a record."
+        for field in INTAKE_FIELDS:
+            if record[field] is None:
+                return f"{field.replace('_', ' ').capitalize()} must be text."
+        validation_error = self.validate_description(record["description"])
+        if validation_error:
+            return validation_error
+        if not record["location"]:
+            return "Location cannot be empty."
+        if not record["category"]:
+            return "Category cannot be empty."
+        try:
+            datetime.strptime(record["found_date"], "%Y-%m-%d")
+        except ValueError:
+            return "Invalid date format. Use YYYY-MM-DD."
+        return None
+
+    def report_lost_items_bulk(self, records):
+        # Validates every row, then adds all valid rows with one allocation and one commit
+        valid, errors = [], []
+        for row_number, record in enumerate(records, start=1):
+            if isinstance(record, dict):
+                record = {field: text_value(record.get(field)) for field in INTAKE_FIELDS}
+            validation_error = self.validate_record(record)
+            if validation_error:
+                errors.append((row_number, validation_error))
+            else:
+                valid.append(record)
+
+        item_ids = self.generate_item_ids(len(valid))
+        items = [Item(item_id, **record).to_dict() for item_id, record in zip(item_ids, valid)]
+        if items:
+            self.commit("add_items", {"items": items})
+        return {"added": [item["item_id"] for item in items], "errors": errors}
+
+    def add_item(self, item):
+        # Returns the stored ID, which differs from item.item_id if another process took that ID first
+        data = item.to_dict()
+        self.commit("add_item", data)
+        return data["item_id"]
+
+    def mark_claimed(self, item, claim_code=None):
+        data = {"item_id": item.item_id}
+        if claim_code:
+            data.update(claim_code=claim_code, claimed_at=timestamp())
+        if not self.commit("claim_item", data):
+            return False
+        item.claimed = True
+        item.status = "Claimed"
+        return True
+
+    def matches_filters(self, item, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        if category_filter and category_filter != item.category:
+            return False
+        if date_filter and date_filter != item.found_date:
+            return False
+        if start_date and item.found_date < start_date:
+            return False
+        if end_date and item.found_date > end_date:
+            return False
+        return True
+
+    def verify_ownership(self, search_term, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        if self.storage.queryable:
+            records = self.storage.search(search_term, category_filter, date_filter, start_date, end_date)
+            return [Item(**record) for record in records]
+        item_ids = self.search_item_ids(search_term, category_filter, date_filter, start_date, end_date)
+        return [self.items[item_id] for item_id in item_ids]
+
+    def search_item_ids(self, search_term, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        if self.storage.queryable:
+            return self.storage.search_ids(search_term, category_filter, date_filter, start_date, end_date)
+        if not self.indexes_ready and not (search_term or category_filter or date_filter or start_date or end_date):
+            # The full listing is shown right after start; it needs no index
+            if isinstance(self.items, LazyItems):
+                return self.items.unclaimed_ids()
+            return [item_id for item_id, item in self.items.items() if not item.claimed]
+        self.ensure_indexes()
+
+        # Only unclaimed items are indexed; start from whichever index yields the fewest candidates
+        plans = []
+        if search_term:
+            estimate = self.search_index.estimate(search_term)
+            if estimate is not None:
+                plans.append((estimate, lambda: self.search_index.candidates(search_term)))
+        if category_filter:
+            plans.append((len(self.secondary_index.category(category_filter)),
+                          lambda: self.secondary_index.category(category_filter)))
+        if date_filter or start_date or end_date:
+            low, high = (date_filter, date_filter) if date_filter else (start_date, end_date)
+            plans.append((self.secondary_index.unclaimed_by_date.count(low, high),
+                          lambda: self.secondary_index.unclaimed_by_date.range(low, high)))
+        if not plans:
+            return self.search_index.search_ids(search_term)
+
+        results = []
+        for item_id in min(plans, key=lambda plan: plan[0])[1]():
+            if search_term and not self.search_index.contains(item_id, search_term):
                 continue
-            results.append(item)
+            if self.matches_filters(self.items[item_id], category_filter, date_filter, start_date, end_date):
+                results.append(item_id)
+        results.sort(key=self.search_index.order.__getitem__)
         return results
 
+    def supports_ranked_search(self):
+        return RankedIndex is not None and not self.storage.queryable
+
+    def search_ranked(self, search_term, limit=10, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        if not self.supports_ranked_search():
+            return self.verify_ownership(search_term.lower(), category_filter, date_filter, start_date, end_date)[:limit]
+
+        self.ensure_ranked_index()
+
+        def accept(item_id):
+            return self.matches_filters(self.items[item_id], category_filter, date_filter, start_date, end_date)
+
+        filtered = category_filter or date_filter or start_date or end_date
+        ranked = self.ranked_index.search(normalize(search_term), limit, accept if filtered else None)
+        return [self.items[item_id] for item_id, score in ranked]
+
     def verify_ownership_description(self, item_id, description, name, contact):
-        selected_item = next((item for item in self.items if item.item_id == str(item_id)), None)
+        selected_item = self.get_item(item_id)
         if not selected_item:
             return {"success": False, "message": "Item not found"}
 
-        similarity = SequenceMatcher(None, description.lower(), selected_item.description.lower()).ratio()
-        if similarity >= 0.6:
-            claim_code = f"CLAIM-{random.randint(1000, 9999)}"
-            self.claimants.append({"item_id": str(item_id), "claim_code": claim_code, "name": name, "contact": contact})
-            self.save_data()
-            return {"success": True, "claim_code": claim_code}
+        if self.matcher.matches(selected_item, description):
+            claim_code = self.claim_code_allocator.allocate()
+            issued_at = datetime.now()
+            data = Claimant(str(item_id), claim_code, name, contact, timestamp(issued_at)).to_dict()
+            self.commit("add_claimant", data)
+            return {"success": True, "claim_code": data["claim_code"],
+                    "expires_at": (issued_at + CLAIM_TTL).strftime('%Y-%m-%d')}
         return {"success": False, "message": "Description doesn't match"}
 
     def claim_item(self, claim_code):
-        claimant = next(
-            (c for c in self.claimants if c["claim_code"] == claim_code), None
-        )
+        claimant = self.get_claimant(claim_code)
         if not claimant:
             return "Invalid claim code."
+        if claimant.state == "pending" and claimant.issued_at < timestamp(datetime.now() - CLAIM_TTL):
+            # Expire on access too, so a code past its window never works between sweeps
+            self.commit("expire_claims", {"claim_codes": [claim_code], "expired_at": timestamp()})
+            return CLAIM_EXPIRED
+        if claimant.state == "expired":
+            return CLAIM_EXPIRED
 
-        item = next((item for item in self.items if item.item_id == claimant["item_id"]), None)
-        if item and not item.claimed:
-            item.claimed = True
-            item.status = "Claimed"
-            self.save_data()
-            return "Item claimed successfully!"
+        item = self.get_item(claimant.item_id)
+        if claimant.state == "pending" and item and not item.claimed and self.mark_claimed(item, claim_code):
+            return CLAIM_SUCCESS
         else:
             return "Error: Item already claimed or not found."
 
+    def due_claim_codes(self, issued_before):
+        if self.storage.queryable:
+            return self.storage.claims_before("pending", issued_before)
+        due = (self.claimants.get(claim_code) for claim_code in self.claim_index.pop_due(issued_before))
+        return [claimant.claim_code for claimant in due if claimant is not None and claimant.state == "pending"]
+
+    def expire_claims(self, now=None):
+        # The sweeper: pending codes past their window expire, and expired codes past retention are
+        # removed, so the claimant store stays bounded
+        now = now or datetime.now()
+        self.next_sweep = now + SWEEP_INTERVAL
+        expired = {"claim_codes": [], "expired_at": timestamp(now)}
+        purged = {"claim_codes": []}
+        with self.storage.lock():
+            self.catch_up()
+            expired["claim_codes"] = self.due_claim_codes(timestamp(now - CLAIM_TTL))
+            if expired["claim_codes"]:
+                self.commit("expire_claims", expired)
+            # Retention counts from when a code expired, so a code the sweeper reaches late still stays visible
+            retention_cutoff = timestamp(now - EXPIRED_RETENTION)
+            if self.storage.queryable:
+                purged["claim_codes"] = self.storage.expired_before(retention_cutoff)
+            else:
+                purged["claim_codes"] = self.claim_index.expired_before(retention_cutoff)
+            if purged["claim_codes"]:
+                self.commit("purge_claims", purged)
+        return f"Expired {len(expired['claim_codes'])} claim codes and removed {len(purged['claim_codes'])} old ones."
+
     def view_items(self):
-        unclaimed_items = [item for item in self.items if not item.claimed]
+        unclaimed_items = self.verify_ownership("")
         if not unclaimed_items:
             print("No unclaimed items found.")
             return
@@ -129,52 +686,107 @@ class LostAndFoundSystem:
         for item in unclaimed_items:
             print(f"Item ID: {item.item_id} | Location: {item.location} | Found Date: {item.found_date} | Category: {item.category}")
 
+    def metrics_report(self):
+        return self.metrics.report() if self.metrics is not None else None
+
+    def check_admin_password(self, password):
+        return hashlib.sha256(password.encode()).hexdigest() == self.admin_password
+
     def admin_menu(self):
         password = input("Enter admin password: ")
-        if hashlib.sha256(password.encode()).hexdigest() != self.admin_password:
+        if not self.check_admin_password(password):
             print("Invalid password.")
             return
 
         while True:
             print("\nAdmin Menu:")
             print("1. Search claimed items")
-            print("2. View all claimed items")
+            print("2. View claims")
             print("3. Archive old claims")
-            print("4. Go back")
+            print("4. Search archived items")
+            print("5. Expire stale claim codes")
+            print("6. Go back")
 
             choice = input("Enter choice: ")
             if choice == "1":
                 item_id = input("Enter item ID: ")
-                claimant = next((c for c in self.claimants if c["item_id"] == item_id), None)
-                if claimant:
-                    print(f"\nItem ID: {claimant['item_id']}")
-                    print(f"Claim Code: {claimant['claim_code']}")
-                    print(f"Claimant Name: {claimant['name']}")
-                    print(f"Claimant Contact: {claimant['contact']}")
+                claimants = self.get_claimants_for_item(item_id)
+                if claimants:
+                    claimant = claimants[0]
+                    print(f"\nItem ID: {claimant.item_id}")
+                    print(f"Claim Code: {claimant.claim_code}")
+                    print(f"Claimant Name: {claimant.name}")
+                    print(f"Claimant Contact: {claimant.contact}")
                 else:
                     print("Item not found.")
             elif choice == "2":
-                claimed_items = [c for c in self.claimants]
-                if claimed_items:
-                    print("\nClaimed Items:")
-                    for c in claimed_items:
-                        print(f"Item ID: {c['item_id']} | Claim Code: {c['claim_code']} | Name: {c['name']} | Contact: {c['contact']}")
-                else:
-                    print("No claimed items.")
+                state = input("Claim state (pending/collected/expired, default collected): ").strip() or "collected"
+                if state not in CLAIM_STATES:
+                    print("Invalid state.")
+                    continue
+                total = self.count_claims(state)
+                print(f"\n{total} {state} claims:")
+                for offset in range(0, total, CLAIMS_PAGE_SIZE):
+                    for c in self.list_claims(state, offset, CLAIMS_PAGE_SIZE):
+                        print(f"Item ID: {c.item_id} | Claim Code: {c.claim_code} | Name: {c.name} | Contact: {c.contact} | Issued: {c.issued_at}")
+                    if offset + CLAIMS_PAGE_SIZE < total and input("Enter for more, q to stop: ").strip().lower() == "q":
+                        break
             elif choice == "3":
-                self.archive_old_claims()
+                print(self.archive_old_claims())
             elif choice == "4":
+                search_term = input("Enter item description to search: ")
+                start_date = input("Found on or after (YYYY-MM-DD, optional): ").strip() or None
+                end_date = input("Found on or before (YYYY-MM-DD, optional): ").strip() or None
+                archived_items = self.query_archive(search_term, start_date, end_date)
+                if archived_items:
+                    print("\nArchived Items:")
+                    for record in archived_items:
+                        codes = ", ".join(c["claim_code"] for c in record["claimants"])
+                        print(f"Item ID: {record['item_id']} | Found Date: {record['found_date']} | Category: {record['category']} | Description: {record['description']} | Claim Codes: {codes}")
+                else:
+                    print("No archived items found.")
+            elif choice == "5":
+                print(self.expire_claims())
+            elif choice == "6":
                 break
 
     def archive_old_claims(self):
         thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        archived = 0
-        for item in self.items[:]:
-            if item.claimed and item.found_date < thirty_days_ago:
-                self.items.remove(item)
-                archived += 1
-        self.save_data()
-        return f"Archived {archived} items."
+        # Held throughout so two processes never archive the same items
+        with self.storage.lock():
+            self.catch_up()
+            if self.storage.queryable:
+                records = self.storage.claimed_items_before(thirty_days_ago)
+            else:
+                self.ensure_indexes()
+                # Claimed items are kept in date order, so the old ones are a prefix of that index
+                archived_ids = self.secondary_index.claimed_by_date.pop_before(thirty_days_ago)
+                records = [self.items[item_id].to_dict() for item_id in archived_ids]
+            for record in records:
+                record["claimants"] = [claimant.to_dict() for claimant in self.get_claimants_for_item(record["item_id"])]
+            # Write the cold copy before the records leave the hot store
+            self.archive_store.write(records)
+            self.commit("archive_items", {"item_ids": [record["item_id"] for record in records]})
+            return f"Archived {len(records)} items."
+
+    def iter_item_records(self):
+        if self.storage.queryable:
+            return self.storage.iter_items()
+        return (item.to_dict() for item in self.items.values())
+
+    def reconcile_inquiries(self, inquiries, top_n=DEFAULT_TOP_N, workers=None):
+        # Best unclaimed candidates for each of many lost-item inquiries, scored like verify_ownership_description
+        unclaimed = [record for record in self.iter_item_records() if not record["claimed"]]
+        return reconcile(unclaimed, inquiries, top_n, workers, threshold=self.matcher.threshold)
+
+    def import_items(self, path):
+        return self.report_lost_items_bulk(read_records(path))
+
+    def export_items(self, path):
+        return write_records(path, self.iter_item_records())
+
+    def query_archive(self, search_term="", start_date=None, end_date=None, category_filter=None):
+        return list(self.archive_store.query(search_term, start_date, end_date, category_filter))
 
     def run(self):
         while True:
@@ -187,12 +799,21 @@ class LostAndFoundSystem:
             print("6. Exit")
 
             choice = input("Enter choice: ")
+            # Other kiosks may have changed the data while this one waited for input
+            self.sync()
             if choice == "1":
                 description = input("Enter description: ")
                 location = input("Enter location: ")
                 found_date = input("Enter found date (YYYY-MM-DD): ")
                 category = input("Enter category: ")
-                print(self.report_lost_item(description, location, found_date, category))
+                duplicates = self.find_duplicates(description, found_date, category)
+                if duplicates:
+                    print("\nThis looks like an item that was already reported:")
+                    for item in duplicates:
+                        print(f"Item ID: {item.item_id} | Location: {item.location} | Found Date: {item.found_date} | Description: {item.description}")
+                    if input("Report it anyway? (y/n): ").strip().lower() != "y":
+                        continue
+                print(self.report_lost_item(description, location, found_date, category, check_duplicates=False))
             elif choice == "2":
                 search_term = input("Enter item description to search: ")
                 matching_items = self.verify_ownership(search_term)
@@ -213,4 +834,71 @@ class LostAndFoundSystem:
                 print("Thank you for using the Lost and Found System!")
                 break
             else:
-                print("Invalid choice. Please try again.")
\ No newline at end of file
+                print("Invalid choice. Please try again.")
+
+
+def migrate_json_to_sqlite(db_path="findit.db", source=None):
+    # Load through the JSON backend so any pending journal records are applied first
+    system = LostAndFoundSystem(storage=source)
+    target = SqliteStorage(db_path)
+    target.import_records(*system.snapshot())
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lost and Found System")
+    parser.add_argument("--db", help="use the SQLite database at this path instead of the JSON files")
+    parser.add_argument("--metrics", metavar="PATH", help="record operation metrics and write them here on exit (.prom for Prometheus text)")
+    parser.add_argument("--metrics-port", type=int, help="record operation metrics and serve them over HTTP on this port")
+    parser.add_argument("--profile", metavar="PATH", help="sample stacks while running and write them here as collapsed stacks")
+    subparsers = parser.add_subparsers(dest="command")
+    migrate_parser = subparsers.add_parser("migrate", help="copy items.json and claimants.json into a SQLite database")
+    migrate_parser.add_argument("db_path", nargs="?", default="findit.db")
+    import_parser = subparsers.add_parser("import", help="report found items from a CSV or JSONL file")
+    import_parser.add_argument("path")
+    export_parser = subparsers.add_parser("export", help="write all items to a CSV or JSONL file")
+    export_parser.add_argument("path")
+    reconcile_parser = subparsers.add_parser("reconcile", help="find candidate items for lost-item inquiries in a CSV or JSONL file")
+    reconcile_parser.add_argument("path")
+    reconcile_parser.add_argument("--top", type=int, default=DEFAULT_TOP_N, help="candidates to report per inquiry")
+    reconcile_parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    serve_parser = subparsers.add_parser("serve", help="serve the data to kiosks over a local socket")
+    serve_parser.add_argument("--host", default="127.0.0.1",
+                              help="address to listen on; traffic, admin password included, is not encrypted")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--socket", help="listen on this Unix socket path instead of TCP")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate_json_to_sqlite(args.db_path)
+        print(f"Migrated JSON data into {args.db_path}.")
+        sys.exit()
+
+    metrics = Metrics() if args.metrics or args.metrics_port or args.profile else None
+    if args.profile:
+        metrics.start_profiler()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    system = LostAndFoundSystem(storage=SqliteStorage(args.db) if args.db else None, metrics=metrics)
+    try:
+        if args.command == "import":
+            result = system.import_items(args.path)
+            for row_number, message in result["errors"]:
+                print(f"Row {row_number}: {message}", file=sys.stderr)
+            print(f"Imported {len(result['added'])} items, skipped {len(result['errors'])} rows.")
+        elif args.command == "export":
+            print(f"Exported {system.export_items(args.path)} items to {args.path}.")
+        elif args.command == "reconcile":
+            # One JSON line per inquiry, written as soon as it is matched
+            for result in system.reconcile_inquiries(read_records(args.path), args.top, args.workers):
+                print(json.dumps(result), flush=True)
+        elif args.command == "serve":
+            from service import serve
+            serve(system, args.host, args.port, args.socket)
+        else:
+            system.run()
+    finally:
+        if args.metrics:
+            write_report(metrics.report(), args.metrics)
+        if args.profile:
+            metrics.stop_profiler().write_collapsed(args.profile)
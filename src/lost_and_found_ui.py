@@ -1,13 +1,24 @@
-import hashlib
+import argparse
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 import ttkthemes
-from lost_and_found_system import LostAndFoundSystem, Item
+from lost_and_found_system import LostAndFoundSystem, CLAIM_SUCCESS
+from claim_index import CLAIM_STATES
+from storage import JsonStorage
+from background import BackgroundWorker
+from virtual_tree import VirtualTree
+from metrics import Metrics, quantile, write_report
+
+# Search-as-you-type waits for this long after the last keystroke
+SEARCH_DELAY_MS = 300
+# How often to look for changes made by other kiosks sharing the data files
+SYNC_INTERVAL_MS = 2000
+CLAIMS_PAGE_SIZE = 100
 
 
 class LostAndFoundUI:
-    def __init__(self):
+    def __init__(self, system=None):
         self.root = tk.Tk()
         self.root.title("Lost and Found System")
         self.root.geometry("800x600")
@@ -17,9 +28,16 @@ class LostAndFoundUI:
         self.fg_color = '#ffffff'
         self.accent_color = '#007acc'
         self.root.configure(bg=self.bg_color)
-        self.system = LostAndFoundSystem()
+        # A ServiceClient can stand in for the system to run this kiosk against a shared service
+        self.system = system or LostAndFoundSystem(storage=JsonStorage(snapshot=True, shared=True))
+        # Searches, verification and saves run on the worker so the window keeps responding
+        self.worker = BackgroundWorker(self.root)
+        self.pending_changes = 0
+        self.search_after = None
         self.setup_styles()
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after(SYNC_INTERVAL_MS, self.sync)
 
     def setup_styles(self):
         self.style.configure('Custom.TFrame', background=self.bg_color)
@@ -57,9 +75,46 @@ class LostAndFoundUI:
         self.notebook.add(self.create_view_tab(), text="View All Items")
         self.notebook.add(self.create_admin_tab(), text="Admin Settings")
 
-        exit_btn = ttk.Button(self.scrollable_frame, text="Exit", style='Custom.TButton', command=self.root.destroy)
+        self.save_status_label = ttk.Label(self.scrollable_frame, text="All changes saved", style='Custom.TLabel')
+        self.save_status_label.pack()
+
+        exit_btn = ttk.Button(self.scrollable_frame, text="Exit", style='Custom.TButton', command=self.close)
         exit_btn.pack(pady=10)
 
+    def run_change(self, func, *args, on_done=None):
+        self.pending_changes += 1
+        self.save_status_label.config(text="Saving changes...")
+
+        def finish(result):
+            self.change_finished()
+            if on_done is not None:
+                on_done(result)
+
+        def fail(error):
+            self.change_finished()
+            messagebox.showerror("Error", f"Could not save changes: {error}")
+
+        self.worker.submit(func, *args, on_done=finish, on_error=fail)
+
+    def change_finished(self):
+        self.pending_changes -= 1
+        if not self.pending_changes:
+            self.save_status_label.config(text="All changes saved")
+
+    def show_error(self, error):
+        messagebox.showerror("Error", str(error))
+
+    def sync(self):
+        self.worker.submit(self.system.sync, on_done=self.synced, on_error=self.show_error, channel="sync")
+        self.root.after(SYNC_INTERVAL_MS, self.sync)
+
+    def synced(self, changed):
+        if not changed:
+            return
+        self.refresh_items()
+        if self.results_tree.keys:
+            self.search_items(show_errors=False, reset=False)
+
     def create_report_tab(self):
         frame = ttk.Frame(self.notebook, style='Custom.TFrame')
         ttk.Label(frame, text="Provide a detailed description of the lost item:", style='Custom.TLabel').pack(anchor='w')
@@ -86,26 +141,43 @@ class LostAndFoundUI:
         ttk.Label(search_frame, text="Search Item:", style='Custom.TLabel').pack(anchor='w')
         self.search_entry = ttk.Entry(search_frame, width=50)
         self.search_entry.pack(fill=tk.X, pady=(0, 10))
+        self.search_entry.bind('<KeyRelease>', self.schedule_search)
 
         ttk.Label(search_frame, text="Found Date (YYYY-MM-DD):", style='Custom.TLabel').pack(anchor='w')
         self.date_filter_entry = ttk.Entry(search_frame, width=50)
         self.date_filter_entry.pack(fill=tk.X, pady=(0, 10))
+        self.date_filter_entry.bind('<KeyRelease>', self.schedule_search)
+
+        ttk.Label(search_frame, text="Found Between (YYYY-MM-DD to YYYY-MM-DD):", style='Custom.TLabel').pack(anchor='w')
+        date_range_frame = ttk.Frame(search_frame, style='Custom.TFrame')
+        date_range_frame.pack(fill=tk.X, pady=(0, 10))
+        self.start_date_entry = ttk.Entry(date_range_frame, width=22)
+        self.start_date_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.start_date_entry.bind('<KeyRelease>', self.schedule_search)
+        ttk.Label(date_range_frame, text=" to ", style='Custom.TLabel').pack(side=tk.LEFT)
+        self.end_date_entry = ttk.Entry(date_range_frame, width=22)
+        self.end_date_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.end_date_entry.bind('<KeyRelease>', self.schedule_search)
 
         ttk.Label(search_frame, text="Category:", style='Custom.TLabel').pack(anchor='w')
         self.category_filter_combo = ttk.Combobox(search_frame, values=["All", "Electronics", "Clothing", "Accessories", "Others"], state="readonly")
         self.category_filter_combo.set("All")
         self.category_filter_combo.pack(fill=tk.X, pady=(0, 10))
+        self.category_filter_combo.bind('<<ComboboxSelected>>', self.schedule_search)
+
+        self.ranked_search_var = tk.BooleanVar(value=False)
+        if self.system.supports_ranked_search():
+            ttk.Checkbutton(search_frame, text="Rank by similarity (closest matches first)", variable=self.ranked_search_var,
+                            command=self.schedule_search).pack(anchor='w', pady=(0, 10))
 
         search_btn = ttk.Button(search_frame, text="Search", style='Custom.TButton', command=self.search_items)
         search_btn.pack(pady=(0, 10))
 
-        self.results_tree = ttk.Treeview(frame, columns=('ID', 'Location', 'Date', 'Category'), show='headings', height=5)
-        self.results_tree.heading('ID', text='Item ID')
-        self.results_tree.heading('Location', text='Location')
-        self.results_tree.heading('Date', text='Found Date')
-        self.results_tree.heading('Category', text='Category')
+        self.results_tree = VirtualTree(frame, ('ID', 'Location', 'Date', 'Category'),
+                                        ('Item ID', 'Location', 'Found Date', 'Category'), self.item_rows, height=5,
+                                        worker=self.worker)
         self.results_tree.pack(fill=tk.X, pady=(0, 20))
-        self.results_tree.bind('<<TreeviewSelect>>', self.show_verification_form)
+        self.results_tree.bind_select(self.show_verification_form)
 
         self.verification_frame = ttk.Frame(frame, style='Custom.TFrame')
         ttk.Label(self.verification_frame, text="Complete Verification Form", style='Title.TLabel').pack(pady=(0, 20))
@@ -124,9 +196,12 @@ class LostAndFoundUI:
         self.attempts_label.pack(pady=(10, 0))
         return frame
 
-    def show_verification_form(self, event):
-        selection = self.results_tree.selection()
-        if selection:
+    def item_rows(self, item_ids):
+        return {item.item_id: (item.item_id, item.location, item.found_date, item.category)
+                for item in self.system.get_items(item_ids)}
+
+    def show_verification_form(self):
+        if self.results_tree.selection():
             self.verify_name_entry.delete(0, tk.END)
             self.verify_contact_entry.delete(0, tk.END)
             self.verify_description_text.delete('1.0', tk.END)
@@ -135,30 +210,48 @@ class LostAndFoundUI:
         else:
             self.verification_frame.pack_forget()
 
-    def search_items(self):
+    def schedule_search(self, event=None):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DELAY_MS, self.search_items, False)
+
+    def search_items(self, show_errors=True, reset=True):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+            self.search_after = None
         search_term = self.search_entry.get().lower()
         selected_category = self.category_filter_combo.get()
         date_filter = self.date_filter_entry.get().strip()
+        start_date = self.start_date_entry.get().strip()
+        end_date = self.end_date_entry.get().strip()
         category_filter = None if selected_category == "All" else selected_category
 
-        if date_filter:
-            try:
-                datetime.strptime(date_filter, '%Y-%m-%d')
-            except ValueError:
-                messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD.")
-                return
+        for value in (date_filter, start_date, end_date):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    # Half-typed dates are expected while searching as you type
+                    if show_errors:
+                        messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD.")
+                    return
+
+        ranked = self.ranked_search_var.get()
+
+        def find_item_ids():
+            if ranked:
+                ranked_items = self.system.search_ranked(search_term, 20, category_filter, date_filter, start_date, end_date)
+                return [item.item_id for item in ranked_items]
+            return self.system.search_item_ids(search_term, category_filter, date_filter, start_date, end_date)
 
-        matching_items = self.system.verify_ownership(search_term, category_filter, date_filter)
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-        for item in matching_items:
-            self.results_tree.insert('', tk.END, values=(item.item_id, item.location, item.found_date, item.category))
+        # Only the latest search on the channel reports back; superseded ones are skipped or dropped
+        self.worker.submit(find_item_ids, on_done=lambda item_ids: self.results_tree.set_keys(item_ids, reset=reset),
+                           on_error=self.show_error, channel="search")
 
     def verify_ownership(self):
-        selection = self.results_tree.selection()
-        if not selection:
+        item_id = self.results_tree.selection()
+        if not item_id:
             return
-        item_id = self.results_tree.item(selection[0])['values'][0]
         name = self.verify_name_entry.get().strip()
         contact = self.verify_contact_entry.get().strip()
         description = self.verify_description_text.get('1.0', tk.END).strip()
@@ -173,13 +266,16 @@ class LostAndFoundUI:
             self.verification_frame.pack_forget()
             return
 
-        result = self.system.verify_ownership_description(item_id, description, name, contact)
+        self.run_change(self.system.verify_ownership_description, item_id, description, name, contact,
+                        on_done=lambda result: self.show_verification_result(result, current_attempts))
+
+    def show_verification_result(self, result, current_attempts):
         if result["success"]:
-            messagebox.showinfo("Success", f"Ownership verified!\nYour claim code is: {result['claim_code']}\n\nPlease keep this code safe.")
+            messagebox.showinfo("Success", f"Ownership verified!\nYour claim code is: {result['claim_code']}\n\n"
+                                           f"Please keep this code safe. It must be used by {result['expires_at']}.")
             self.verification_frame.pack_forget()
             self.search_entry.delete(0, tk.END)
-            for item in self.results_tree.get_children():
-                self.results_tree.delete(item)
+            self.results_tree.set_keys([])
         else:
             remaining_attempts = current_attempts - 1
             self.attempts_label.config(text=f"Attempts remaining: {remaining_attempts}")
@@ -200,15 +296,10 @@ class LostAndFoundUI:
 
     def create_view_tab(self):
         frame = ttk.Frame(self.notebook, style='Custom.TFrame')
-        self.items_tree = ttk.Treeview(frame, columns=('ID', 'Location', 'Date', 'Category'), show='headings')
-        self.items_tree.heading('ID', text='Item ID')
-        self.items_tree.heading('Location', text='Location')
-        self.items_tree.heading('Date', text='Found Date')
-        self.items_tree.heading('Category', text='Category')
-        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.items_tree.yview)
-        self.items_tree.configure(yscrollcommand=scrollbar.set)
-        self.items_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.items_tree = VirtualTree(frame, ('ID', 'Location', 'Date', 'Category'),
+                                      ('Item ID', 'Location', 'Found Date', 'Category'), self.item_rows,
+                                      worker=self.worker)
+        self.items_tree.pack(fill=tk.BOTH, expand=True)
         refresh_btn = ttk.Button(frame, text="Refresh", style='Custom.TButton', command=self.refresh_items)
         refresh_btn.pack(pady=10)
         return frame
@@ -221,8 +312,10 @@ class LostAndFoundUI:
         login_btn = ttk.Button(frame, text="Login", style='Custom.TButton', command=self.admin_login)
         login_btn.pack(pady=(0, 20))
         self.admin_controls = ttk.Frame(frame, style='Custom.TFrame')
-        ttk.Button(self.admin_controls, text="View Claimed Items", style='Custom.TButton', command=self.view_claimed_items).pack(pady=5)
+        ttk.Button(self.admin_controls, text="View Claims", style='Custom.TButton', command=self.view_claims).pack(pady=5)
         ttk.Button(self.admin_controls, text="Archive Old Claims", style='Custom.TButton', command=self.archive_claims).pack(pady=5)
+        ttk.Button(self.admin_controls, text="Search Archive", style='Custom.TButton', command=self.search_archive).pack(pady=5)
+        ttk.Button(self.admin_controls, text="View Metrics", style='Custom.TButton', command=self.view_metrics).pack(pady=5)
         return frame
 
     def submit_report(self):
@@ -246,31 +339,51 @@ class LostAndFoundUI:
 
             datetime.strptime(found_date, '%Y-%m-%d')
 
-            item = Item(self.system.generate_item_id(), description, location, found_date, category)
-            self.system.items.append(item)
-            self.system.save_data()
+            def add_report():
+                # The duplicate check already ran and the user confirmed the report
+                return self.system.report_lost_item(description, location, found_date, category, check_duplicates=False)
 
-            messagebox.showinfo("Success", f"Item reported successfully. Item ID: {item.item_id}")
+            def confirm_report(duplicates):
+                if duplicates:
+                    listing = "\n".join(f"{item.item_id}: {item.description} ({item.location}, {item.found_date})"
+                                        for item in duplicates)
+                    if not messagebox.askyesno("Possible Duplicate",
+                                               f"This looks like an item that was already reported:\n\n{listing}\n\n"
+                                               "Report it anyway?"):
+                        return
+                self.run_change(add_report, on_done=self.report_added)
 
-            self.description_entry.delete(0, tk.END)
-            self.location_entry.delete(0, tk.END)
-            self.date_entry.delete(0, tk.END)
-            self.category_combo.set('')
+            # The duplicate check runs on the worker; the answer decides whether the report is saved
+            self.worker.submit(self.system.find_duplicates, description, found_date, category, on_done=confirm_report,
+                               on_error=self.show_error, channel="duplicates")
 
         except ValueError:
             messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD")
 
+    def report_added(self, message):
+        if not message.startswith("Item reported successfully"):
+            messagebox.showerror("Error", message)
+            return
+        messagebox.showinfo("Success", message)
+
+        self.description_entry.delete(0, tk.END)
+        self.location_entry.delete(0, tk.END)
+        self.date_entry.delete(0, tk.END)
+        self.category_combo.set('')
+
     def claim_item(self):
         claim_code = self.claim_code_entry.get().strip()
-        claimant = next((c for c in self.system.claimants if c["claim_code"] == claim_code), None)
-        if not claimant:
-            messagebox.showerror("Error", "Invalid claim code.")
-            return
-        item = next((item for item in self.system.items if item.item_id == claimant["item_id"]), None)
-        if item and not item.claimed:
-            item.claimed = True
-            item.status = "Claimed"
-            self.system.save_data()
+
+        def claim():
+            # claim_item also refuses codes past their collection window
+            message = self.system.claim_item(claim_code)
+            return None if message == CLAIM_SUCCESS else message
+
+        self.run_change(claim, on_done=self.show_claim_result)
+        self.claim_code_entry.delete(0, tk.END)
+
+    def show_claim_result(self, error):
+        if error is None:
             messagebox.showinfo("Success", 
                 "Item claimed successfully!\n\n"
                 "Instructions to collect your item:\n"
@@ -280,46 +393,202 @@ class LostAndFoundUI:
                 "4. Items must be collected within 7 days of claiming"
             )
         else:
-            messagebox.showerror("Error", "Item already claimed or not found.")
-        self.claim_code_entry.delete(0, tk.END)
+            messagebox.showerror("Error", error)
 
     def refresh_items(self):
-        for item in self.items_tree.get_children():
-            self.items_tree.delete(item)
-        unclaimed_items = [item for item in self.system.items if not item.claimed]
-        for item in unclaimed_items:
-            self.items_tree.insert('', tk.END, values=(item.item_id, item.location, item.found_date, item.category))
+        self.worker.submit(self.system.search_item_ids, "", on_done=self.items_tree.set_keys, on_error=self.show_error,
+                           channel="refresh")
 
     def admin_login(self):
         password = self.admin_password_entry.get()
-        if hashlib.sha256(password.encode()).hexdigest() == self.system.admin_password:
-            self.admin_controls.pack(fill=tk.BOTH, expand=True)
-            self.admin_password_entry.delete(0, tk.END)
-        else:
-            messagebox.showerror("Error", "Invalid password")
-
-    def view_claimed_items(self):
-        claimed_items_window = tk.Toplevel(self.root)
-        claimed_items_window.title("Claimed Items")
-        claimed_items_window.geometry("600x400")
-        tree = ttk.Treeview(claimed_items_window, columns=('ID', 'Code', 'Name', 'Contact'), show='headings')
-        tree.heading('ID', text='Item ID')
-        tree.heading('Code', text='Claim Code')
-        tree.heading('Name', text='Claimant Name')
-        tree.heading('Contact', text='Contact')
-        for claimant in self.system.claimants:
-            tree.insert('', tk.END, values=(claimant['item_id'], claimant['claim_code'], claimant['name'], claimant['contact']))
-        tree.pack(fill=tk.BOTH, expand=True)
+
+        def logged_in(valid):
+            if valid:
+                self.admin_controls.pack(fill=tk.BOTH, expand=True)
+                self.admin_password_entry.delete(0, tk.END)
+            else:
+                messagebox.showerror("Error", "Invalid password")
+
+        # A wrong password is answered only after a delay, which must not freeze the window
+        self.worker.submit(self.system.check_admin_password, password, on_done=logged_in, on_error=self.show_error)
+
+    def view_claims(self):
+        claims_window = tk.Toplevel(self.root)
+        claims_window.title("Claims")
+        claims_window.geometry("700x450")
+        claims_window.configure(bg=self.bg_color)
+        controls = ttk.Frame(claims_window, style='Custom.TFrame')
+        controls.pack(fill=tk.X, padx=10, pady=10)
+        state_combo = ttk.Combobox(controls, values=CLAIM_STATES, state='readonly', width=12)
+        state_combo.set("collected")
+        state_combo.pack(side=tk.LEFT)
+        page_label = ttk.Label(controls, text="", style='Custom.TLabel')
+
+        # Claims are fetched a page at a time, so a large claimant store is never listed in full
+        claim_rows = {}
+        page = {"offset": 0, "total": 0}
+        tree = VirtualTree(claims_window, ('ID', 'Code', 'Name', 'Contact', 'Issued'),
+                           ('Item ID', 'Claim Code', 'Claimant Name', 'Contact', 'Issued'),
+                           lambda claim_codes: {claim_code: claim_rows[claim_code] for claim_code in claim_codes})
+
+        def load_page():
+            state = state_combo.get()
+
+            def fetch():
+                return self.system.count_claims(state), self.system.list_claims(state, page["offset"], CLAIMS_PAGE_SIZE)
+
+            self.worker.submit(fetch, on_done=show_page, on_error=self.show_error, channel="claims")
+
+        def show_page(result):
+            page["total"], claimants = result
+            claim_rows.clear()
+            for claimant in claimants:
+                claim_rows[claimant.claim_code] = (claimant.item_id, claimant.claim_code, claimant.name, claimant.contact,
+                                                   claimant.issued_at)
+            shown = f"{page['offset'] + 1}-{page['offset'] + len(claimants)}" if claimants else "0"
+            page_label.config(text=f"{shown} of {page['total']}")
+            tree.set_keys(claim_rows, reset=True)
+
+        def change_state(event=None):
+            page["offset"] = 0
+            load_page()
+
+        def turn_page(step):
+            offset = page["offset"] + step * CLAIMS_PAGE_SIZE
+            if 0 <= offset < max(page["total"], 1):
+                page["offset"] = offset
+                load_page()
+
+        state_combo.bind('<<ComboboxSelected>>', change_state)
+        ttk.Button(controls, text="Previous", style='Custom.TButton', command=lambda: turn_page(-1)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Next", style='Custom.TButton', command=lambda: turn_page(1)).pack(side=tk.LEFT)
+        page_label.pack(side=tk.LEFT, padx=10)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        load_page()
 
     def archive_claims(self):
-        self.system.archive_old_claims()
-        messagebox.showinfo("Success", "Old claims archived successfully")
+        self.run_change(self.system.archive_old_claims,
+                        on_done=lambda message: messagebox.showinfo("Success", "Old claims archived successfully"))
+
+    def search_archive(self):
+        archive_window = tk.Toplevel(self.root)
+        archive_window.title("Archived Items")
+        archive_window.geometry("700x450")
+        archive_window.configure(bg=self.bg_color)
+        search_frame = ttk.Frame(archive_window, style='Custom.TFrame')
+        search_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(search_frame, text="Search Item:", style='Custom.TLabel').pack(anchor='w')
+        search_entry = ttk.Entry(search_frame, width=50)
+        search_entry.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(search_frame, text="Found Between (YYYY-MM-DD to YYYY-MM-DD):", style='Custom.TLabel').pack(anchor='w')
+        date_range_frame = ttk.Frame(search_frame, style='Custom.TFrame')
+        date_range_frame.pack(fill=tk.X, pady=(0, 10))
+        start_date_entry = ttk.Entry(date_range_frame, width=22)
+        start_date_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Label(date_range_frame, text=" to ", style='Custom.TLabel').pack(side=tk.LEFT)
+        end_date_entry = ttk.Entry(date_range_frame, width=22)
+        end_date_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        archived_rows = {}
+        tree = VirtualTree(archive_window, ('ID', 'Description', 'Date', 'Category', 'Code'),
+                           ('Item ID', 'Description', 'Found Date', 'Category', 'Claim Code'),
+                           lambda item_ids: {item_id: archived_rows[item_id] for item_id in item_ids})
+
+        def run_search():
+            start_date = start_date_entry.get().strip()
+            end_date = end_date_entry.get().strip()
+            for value in (start_date, end_date):
+                if value:
+                    try:
+                        datetime.strptime(value, '%Y-%m-%d')
+                    except ValueError:
+                        messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD.", parent=archive_window)
+                        return
+            self.worker.submit(self.system.query_archive, search_entry.get().strip(), start_date or None, end_date or None,
+                               on_done=show_records, on_error=self.show_error, channel="archive")
+
+        def show_records(records):
+            archived_rows.clear()
+            for record in records:
+                codes = ", ".join(claimant["claim_code"] for claimant in record["claimants"])
+                archived_rows[record['item_id']] = (record['item_id'], record['description'], record['found_date'], record['category'], codes)
+            tree.set_keys(archived_rows, reset=True)
+
+        ttk.Button(search_frame, text="Search", style='Custom.TButton', command=run_search).pack()
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+    def view_metrics(self):
+        metrics_window = tk.Toplevel(self.root)
+        metrics_window.title("Metrics")
+        metrics_window.geometry("700x450")
+        metrics_window.configure(bg=self.bg_color)
+        counters_label = ttk.Label(metrics_window, text="Loading metrics...", style='Custom.TLabel', justify=tk.LEFT)
+        counters_label.pack(anchor='w', padx=10, pady=10)
+
+        operation_rows = {}
+        tree = VirtualTree(metrics_window, ('Operation', 'Count', 'Mean', 'P50', 'P95'),
+                           ('Operation', 'Count', 'Mean (ms)', 'p50 (ms)', 'p95 (ms)'),
+                           lambda names: {name: operation_rows[name] for name in names})
+        current = {}
+
+        def refresh():
+            self.worker.submit(self.system.metrics_report, on_done=show_report, on_error=self.show_error, channel="metrics")
+
+        def show_report(report):
+            current["report"] = report
+            operation_rows.clear()
+            if report is None:
+                counters_label.config(text="Metrics are off. Start the application with --metrics to record them.")
+                tree.set_keys([], reset=True)
+                return
+            counters_label.config(text="  ".join(f"{name.replace('_', ' ')}: {value}" for name, value in report["counters"].items()))
+            for name, histogram in report["operations"].items():
+                mean = histogram["sum"] / histogram["count"] if histogram["count"] else 0.0
+                operation_rows[name] = (name, histogram["count"], f"{mean * 1000:.2f}",
+                                        f"<= {quantile(histogram, 0.5) * 1000:g}", f"<= {quantile(histogram, 0.95) * 1000:g}")
+            tree.set_keys(operation_rows, reset=True)
+
+        def export():
+            if current.get("report") is None:
+                return
+            path = filedialog.asksaveasfilename(parent=metrics_window, defaultextension=".json",
+                                                filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+            if path:
+                write_report(current["report"], path)
+
+        button_frame = ttk.Frame(metrics_window, style='Custom.TFrame')
+        button_frame.pack(fill=tk.X, padx=10)
+        ttk.Button(button_frame, text="Refresh", style='Custom.TButton', command=refresh).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Export...", style='Custom.TButton', command=export).pack(side=tk.LEFT)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        refresh()
 
     def run(self):
-        self.refresh_items()
+        # Let the window draw before the item list is loaded
+        self.root.after_idle(self.refresh_items)
         self.root.mainloop()
 
+    def close(self):
+        # Queued changes are saved before the window goes away
+        self.save_status_label.config(text="Saving changes...")
+        self.root.update_idletasks()
+        self.worker.stop()
+        self.root.destroy()
+
 
 if __name__ == "__main__":
-    app = LostAndFoundUI()
+    parser = argparse.ArgumentParser(description="Lost and Found System")
+    parser.add_argument("--connect", metavar="ADDRESS",
+                        help="use the service at HOST:PORT or at a Unix socket path instead of local data files")
+    parser.add_argument("--metrics", action="store_true", help="record operation metrics for the Admin tab")
+    args = parser.parse_args()
+
+    system = None
+    if args.connect:
+        from service import ServiceClient
+        host, separator, port = args.connect.rpartition(":")
+        system = ServiceClient(host, int(port)) if separator and port.isdigit() else ServiceClient(path=args.connect)
+    elif args.metrics:
+        system = LostAndFoundSystem(storage=JsonStorage(snapshot=True, shared=True), metrics=Metrics())
+    app = LostAndFoundUI(system)
     app.run()
\ No newline at end of file
@@ -0,0 +1,69 @@
+from collections import Counter
+from difflib import SequenceMatcher
+from search_index import normalize
+
+MATCH_THRESHOLD = 0.6
+# SequenceMatcher starts discarding popular characters once the stored text reaches this length
+AUTOJUNK_LENGTH = 200
+
+
+def length_bound(a, b):
+    total = len(a) + len(b)
+    return 2.0 * min(len(a), len(b)) / total if total else 1.0
+
+
+def character_bound(a, b):
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    common = sum((Counter(a) & Counter(b)).values())
+    return 2.0 * common / total
+
+
+class DescriptionMatcher:
+    def __init__(self, threshold=MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.texts = {}
+
+    def __contains__(self, item_id):
+        return item_id in self.texts
+
+    def add(self, item_id, text):
+        self.texts[item_id] = text
+
+    def remove(self, item_id):
+        self.texts.pop(item_id, None)
+
+    def get_text(self, item_id):
+        return self.texts.get(item_id)
+
+    def matches(self, item, description):
+        text = self.texts.get(item.item_id)
+        if text is None:
+            text = normalize(item.description)
+        return self.is_match(normalize(description), text)
+
+    def is_match(self, query, text, threshold=None):
+        # query and text must already be normalized; the decision is exactly
+        # SequenceMatcher(None, query, text).ratio() >= threshold
+        return self.score(query, text, threshold) is not None
+
+    def score(self, query, text, floor=None):
+        # SequenceMatcher(None, query, text).ratio() if it reaches floor, else None; the cheap
+        # upper bounds settle most texts that cannot reach it without the full comparison
+        if floor is None:
+            floor = self.threshold
+        bound = length_bound(query, text)
+        if bound < floor:
+            return None
+        # Without junk the longest common block is found first, so containment
+        # makes the ratio equal to the length bound
+        if len(text) < AUTOJUNK_LENGTH and (query in text or text in query):
+            return bound
+        if character_bound(query, text) < floor:
+            return None
+        ratio = self.similarity(query, text)
+        return ratio if ratio >= floor else None
+
+    def similarity(self, query, text):
+        return SequenceMatcher(None, query, text).ratio()
@@ -0,0 +1,260 @@
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, as in Prometheus histograms; the last bucket catches everything else
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+TIMED_OPERATIONS = (
+    "load_data", "save_data", "sync", "verify_ownership", "search_item_ids", "search_ranked",
+    "verify_ownership_description", "claim_item", "mark_claimed", "report_lost_item", "report_lost_items_bulk",
+    "add_item", "generate_item_id", "archive_old_claims", "expire_claims", "find_duplicates",
+)
+SEARCH_OPERATIONS = ("verify_ownership", "search_item_ids", "search_ranked")
+PROFILE_INTERVAL = 0.005
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def to_dict(self):
+        return {"buckets": list(zip(BUCKETS[:-1], self.counts[:-1])) + [["+Inf", self.counts[-1]]],
+                "sum": self.total, "count": self.count}
+
+
+class Metrics:
+    # Instruments one LostAndFoundSystem by wrapping its methods on the instance, so a system
+    # without metrics runs the plain methods and pays nothing
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {"searches": 0, "verifications": 0, "matches": 0, "mismatches": 0, "claims": 0,
+                         "claim_conflicts": 0, "items_reported": 0, "bytes_written": 0}
+        self.hooks = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiler = None
+        self.started = time.time()
+
+    def attach(self, system):
+        for name in TIMED_OPERATIONS:
+            setattr(system, name, self.timed(name, getattr(system, name)))
+        self.attach_storage(system.storage)
+
+    def attach_storage(self, storage):
+        if hasattr(storage, "save"):
+            save = storage.save
+
+            def counted_save(items, claimants, duplicates=None):
+                save(items, claimants, duplicates)
+                paths = (storage.items_file, storage.claimants_file, storage.snapshot_file,
+                         storage.duplicates_file if duplicates is not None else None)
+                self.count("bytes_written", sum(os.path.getsize(path) for path in paths if path and os.path.exists(path)))
+
+            storage.save = counted_save
+        else:
+            # Databases rewrite pages in place, so count the size of each change as the journal would
+            record = storage.record
+
+            def counted_record(op, data, durable=True):
+                self.count("bytes_written", len(json.dumps({"op": op, "data": data}, separators=(',', ':'))))
+                return record(op, data, durable)
+
+            storage.record = counted_record
+        journal = getattr(storage, "journal", None)
+        if journal is not None:
+            append = journal.append
+
+            def counted_append(op, data, durable=True):
+                size = append(op, data, durable)
+                self.count("bytes_written", size)
+                return size
+
+            journal.append = counted_append
+
+    def timed(self, name, method):
+        def wrapper(*args, **kwargs):
+            # Searches call each other internally; only the outermost one counts as a search
+            outermost_search = name in SEARCH_OPERATIONS and not getattr(self.local, "in_search", False)
+            if outermost_search:
+                self.local.in_search = True
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if outermost_search:
+                    self.local.in_search = False
+                self.observe(name, elapsed)
+            self.count_result(name, result, outermost_search)
+            return result
+        return wrapper
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_result(self, name, result, outermost_search):
+        if outermost_search:
+            self.count("searches")
+        elif name == "verify_ownership_description":
+            self.count("verifications")
+            self.count("matches" if result.get("success") else "mismatches")
+        elif name == "mark_claimed":
+            self.count("claims" if result else "claim_conflicts")
+        elif name == "add_item":
+            # Single reports, from report_lost_item or straight from a client, all go through add_item
+            self.count("items_reported")
+        elif name == "report_lost_items_bulk":
+            self.count("items_reported", len(result["added"]))
+
+    def start_profiler(self, interval=PROFILE_INTERVAL):
+        if self.profiler is None:
+            self.profiler = SamplingProfiler(interval)
+            self.profiler.start()
+        return self.profiler
+
+    def stop_profiler(self):
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            profiler.stop()
+        return profiler
+
+    def report(self):
+        with self.lock:
+            return {
+                "uptime_seconds": time.time() - self.started,
+                "operations": {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+                "counters": dict(self.counters),
+            }
+
+    def serve(self, port, host="127.0.0.1"):
+        # /metrics answers in Prometheus text format and /metrics.json in JSON
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = prometheus_text(metrics.report()), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(metrics.report(), indent=4), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def prometheus_text(report):
+    lines = ["# HELP findit_operation_seconds Time spent in LostAndFoundSystem operations.",
+             "# TYPE findit_operation_seconds histogram"]
+    for name, histogram in report["operations"].items():
+        cumulative = 0
+        for bound, count in histogram["buckets"]:
+            cumulative += count
+            lines.append(f'findit_operation_seconds_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'findit_operation_seconds_sum{{operation="{name}"}} {histogram["sum"]}')
+        lines.append(f'findit_operation_seconds_count{{operation="{name}"}} {histogram["count"]}')
+    for name, value in report["counters"].items():
+        lines.append(f"# TYPE findit_{name}_total counter")
+        lines.append(f"findit_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+def quantile(histogram, q):
+    # Upper bound of the bucket holding the q-th observation
+    target = q * histogram["count"]
+    cumulative = 0
+    for bound, count in histogram["buckets"]:
+        cumulative += count
+        if count and cumulative >= target:
+            return float(bound)
+    return 0.0
+
+
+def write_report(report, path):
+    # .prom and .txt files get Prometheus text, anything else JSON
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        if os.path.splitext(path)[1] in (".prom", ".txt"):
+            f.write(prometheus_text(report))
+        else:
+            json.dump(report, f, indent=4)
+    os.replace(temp_path, path)
+
+
+class SamplingProfiler:
+    # Samples the stacks of every other thread at a fixed interval; the counts of collapsed
+    # stacks can be turned into a flame graph
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = {}
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while self.running:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+            time.sleep(self.interval)
+
+    def top(self, limit=20):
+        # Functions by the share of samples in which they were running
+        leaves = {}
+        for stack, count in self.samples.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        return sorted(leaves.items(), key=lambda entry: entry[1], reverse=True)[:limit]
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,148 @@
+import math
+import numpy as np
+
+MIN_COMPACT_SIZE = 4096
+
+
+def features(text):
+    counts = {}
+    for token in text.split():
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            gram = padded[i:i + 3]
+            counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class RankedIndex:
+    def __init__(self):
+        self.vocabulary = {}
+        self.doc_freq = []
+        self.rows = {}
+        self.row_ids = []
+        self.live = bytearray()
+        self.live_count = 0
+        # Postings sorted by term for slicing, plus an unsorted tail of recent additions. Term and
+        # row numbers fit in 32 bits, which keeps a posting at 16 bytes
+        self.base_terms = np.zeros(0, dtype=np.int32)
+        self.base_rows = np.zeros(0, dtype=np.int32)
+        self.base_weights = np.zeros(0, dtype=np.float64)
+        self.delta_terms = []
+        self.delta_rows = []
+        self.delta_weights = []
+
+    def __len__(self):
+        return self.live_count
+
+    def add(self, item_id, text):
+        if item_id in self.rows:
+            self.remove(item_id, text)
+        counts = features(text)
+        if not counts:
+            return
+        row = len(self.row_ids)
+        self.rows[item_id] = row
+        self.row_ids.append(item_id)
+        self.live.append(1)
+        self.live_count += 1
+        norm = math.sqrt(sum(tf * tf for tf in counts.values()))
+        for gram, tf in counts.items():
+            term = self.vocabulary.get(gram)
+            if term is None:
+                term = self.vocabulary[gram] = len(self.doc_freq)
+                self.doc_freq.append(0)
+            self.doc_freq[term] += 1
+            self.delta_terms.append(term)
+            self.delta_rows.append(row)
+            self.delta_weights.append(tf / norm)
+        if len(self.delta_terms) > max(MIN_COMPACT_SIZE, len(self.base_terms) // 4):
+            self.compact()
+
+    def remove(self, item_id, text):
+        row = self.rows.pop(item_id, None)
+        if row is None:
+            return
+        self.live[row] = 0
+        self.live_count -= 1
+        for gram in features(text):
+            self.doc_freq[self.vocabulary[gram]] -= 1
+
+    def compact(self):
+        terms = np.concatenate([self.base_terms, np.array(self.delta_terms, dtype=np.int32)])
+        rows = np.concatenate([self.base_rows, np.array(self.delta_rows, dtype=np.int32)])
+        weights = np.concatenate([self.base_weights, np.array(self.delta_weights, dtype=np.float64)])
+        live = np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+        keep = live[rows]
+        terms, rows, weights = terms[keep], rows[keep], weights[keep]
+        if len(self.row_ids) - self.live_count > max(MIN_COMPACT_SIZE, self.live_count // 4):
+            # Renumber the live rows so removed items stop costing a row id and a score slot;
+            # the order of the rows, which breaks score ties, is kept
+            live_rows = np.flatnonzero(live)
+            renumbered = np.zeros(len(self.row_ids), dtype=np.int32)
+            renumbered[live_rows] = np.arange(len(live_rows))
+            rows = renumbered[rows]
+            self.row_ids = [self.row_ids[row] for row in live_rows.tolist()]
+            self.rows = {item_id: row for row, item_id in enumerate(self.row_ids)}
+            self.live = bytearray(b"\x01" * len(self.row_ids))
+        order = np.argsort(terms, kind='stable')
+        self.base_terms = terms[order]
+        self.base_rows = rows[order]
+        self.base_weights = weights[order]
+        self.delta_terms = []
+        self.delta_rows = []
+        self.delta_weights = []
+
+    def scores(self, query):
+        query_terms = []
+        query_weights = []
+        for gram, tf in features(query).items():
+            term = self.vocabulary.get(gram)
+            if term is None or not self.doc_freq[term]:
+                continue
+            idf = math.log((1 + self.live_count) / (1 + self.doc_freq[term])) + 1
+            query_terms.append(term)
+            query_weights.append(tf * idf)
+        if not query_terms:
+            return None
+
+        query_terms = np.array(query_terms, dtype=np.int64)
+        query_weights = np.array(query_weights, dtype=np.float64)
+        query_weights /= np.linalg.norm(query_weights)
+
+        starts = np.searchsorted(self.base_terms, query_terms, side='left')
+        ends = np.searchsorted(self.base_terms, query_terms, side='right')
+        lengths = ends - starts
+        positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        hit_rows = [self.base_rows[positions]]
+        hit_weights = [self.base_weights[positions] * np.repeat(query_weights, lengths)]
+
+        if self.delta_terms:
+            delta_terms = np.array(self.delta_terms, dtype=np.int64)
+            mask = np.isin(delta_terms, query_terms)
+            term_weights = dict(zip(query_terms.tolist(), query_weights.tolist()))
+            matched_terms = delta_terms[mask]
+            hit_rows.append(np.array(self.delta_rows, dtype=np.int64)[mask])
+            hit_weights.append(np.array(self.delta_weights, dtype=np.float64)[mask]
+                               * np.array([term_weights[t] for t in matched_terms.tolist()], dtype=np.float64))
+
+        scores = np.bincount(np.concatenate(hit_rows), weights=np.concatenate(hit_weights), minlength=len(self.row_ids))
+        scores *= np.frombuffer(self.live, dtype=np.uint8)
+        return scores
+
+    def search(self, query, k=10, accept=None):
+        scores = self.scores(query)
+        if scores is None:
+            return []
+        candidates = np.flatnonzero(scores > 0)
+        if accept is None and len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        results = []
+        for row in candidates.tolist():
+            item_id = self.row_ids[row]
+            if accept is not None and not accept(item_id):
+                continue
+            results.append((item_id, float(scores[row])))
+            if len(results) == k:
+                break
+        return results
@@ -0,0 +1,129 @@
+import heapq
+import os
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from bulk_io import text_value
+from matching import DescriptionMatcher, MATCH_THRESHOLD
+from search_index import normalize
+
+DEFAULT_TOP_N = 5
+CHUNK_SIZE = 64
+INQUIRY_FIELDS = ("description", "category", "lost_date", "start_date", "end_date")
+# Chunks queued per worker; keeps every worker busy without reading the whole input ahead
+CHUNKS_PER_WORKER = 4
+# Sorts after any date
+LAST_DATE = "\uffff"
+
+# Set in each worker process by init_worker
+candidates = None
+matcher = None
+
+
+def build_candidates(items):
+    # Unclaimed items grouped by category, each group in found_date order so a date hint is a slice
+    groups = {}
+    for item in items:
+        groups.setdefault(item["category"], []).append((item["found_date"], item["item_id"], normalize(item["description"])))
+    table = {}
+    for category, entries in groups.items():
+        entries.sort()
+        table[category] = ([entry[0] for entry in entries], [(entry[1], entry[2]) for entry in entries])
+    return table
+
+
+def init_worker(table, threshold):
+    global candidates, matcher
+    candidates = table
+    matcher = DescriptionMatcher(threshold)
+
+
+def prepare(inquiry, row_number):
+    # Returns (inquiry_id, query, category, start_date, end_date), or (inquiry_id, error)
+    if not isinstance(inquiry, dict):
+        return (str(row_number), "Row could not be read as a record.")
+    inquiry_id = text_value(inquiry.get("inquiry_id")) or str(row_number)
+    fields = {field: text_value(inquiry.get(field)) for field in INQUIRY_FIELDS}
+    for field in INQUIRY_FIELDS:
+        if fields[field] is None:
+            return (inquiry_id, f"{field.replace('_', ' ').capitalize()} must be text.")
+    if not fields["description"]:
+        return (inquiry_id, "Description cannot be empty.")
+    for field in ("lost_date", "start_date", "end_date"):
+        if fields[field]:
+            try:
+                datetime.strptime(fields[field], "%Y-%m-%d")
+            except ValueError:
+                return (inquiry_id, "Invalid date format. Use YYYY-MM-DD.")
+    # A lost date means the item can only have been found on or after it
+    start_date = fields["start_date"] or fields["lost_date"] or None
+    return (inquiry_id, normalize(fields["description"]), fields["category"] or None, start_date, fields["end_date"] or None)
+
+
+def best_matches(query, category, start_date, end_date, top_n):
+    # Scores exactly as verify_ownership_description does, but once top_n matches are held an
+    # item has to beat the weakest of them, which lets the bounds skip most comparisons
+    best = []
+    if category:
+        groups = [candidates[category]] if category in candidates else []
+    else:
+        groups = candidates.values()
+    for dates, entries in groups:
+        low = bisect_left(dates, start_date) if start_date else 0
+        high = bisect_right(dates, end_date or LAST_DATE)
+        for item_id, text in entries[low:high]:
+            floor = best[0][0] if len(best) == top_n else matcher.threshold
+            score = matcher.score(query, text, floor)
+            if score is None:
+                continue
+            if len(best) < top_n:
+                heapq.heappush(best, (score, item_id))
+            elif score > best[0][0]:
+                heapq.heapreplace(best, (score, item_id))
+    return [{"item_id": item_id, "score": round(score, 4)} for score, item_id in sorted(best, key=lambda entry: -entry[0])]
+
+
+def match_chunk(chunk, top_n):
+    results = []
+    for prepared in chunk:
+        if len(prepared) == 2:
+            results.append({"inquiry_id": prepared[0], "error": prepared[1]})
+        else:
+            inquiry_id, query, category, start_date, end_date = prepared
+            results.append({"inquiry_id": inquiry_id, "matches": best_matches(query, category, start_date, end_date, top_n)})
+    return results
+
+
+def chunks(inquiries, chunk_size):
+    chunk = []
+    for row_number, inquiry in enumerate(inquiries, start=1):
+        chunk.append(prepare(inquiry, row_number))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reconcile(items, inquiries, top_n=DEFAULT_TOP_N, workers=None, chunk_size=CHUNK_SIZE, threshold=MATCH_THRESHOLD):
+    # Yields one result per inquiry, in input order, as soon as its chunk is done. items are the
+    # unclaimed item records; inquiries have a description and optional inquiry_id, category,
+    # lost_date, start_date and end_date
+    table = build_candidates(items)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        init_worker(table, threshold)
+        for chunk in chunks(inquiries, chunk_size):
+            yield from match_chunk(chunk, top_n)
+        return
+
+    # The candidate table goes to each worker once, when it starts
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(table, threshold)) as executor:
+        pending = deque()
+        for chunk in chunks(inquiries, chunk_size):
+            pending.append(executor.submit(match_chunk, chunk, top_n))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
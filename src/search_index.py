@@ -0,0 +1,114 @@
+from array import array
+
+GRAM_SIZE = 3
+# Removed rows are reclaimed once there are this many and at least as many as live ones
+MIN_COMPACT_ROWS = 4096
+
+
+def normalize(text):
+    return text.lower()
+
+
+def token_grams(text):
+    grams = set()
+    for token in text.split():
+        for i in range(len(token) - GRAM_SIZE + 1):
+            grams.add(token[i:i + GRAM_SIZE])
+    return grams
+
+
+class SearchIndex:
+    # Items are numbered by row in the order they were added. A gram's postings are the rows
+    # holding it, packed in an array; rows only grow, so every array stays sorted. Removed
+    # rows stay in the arrays, with no text, until compact() renumbers the rest
+    def __init__(self):
+        self.postings = {}
+        self.order = {}
+        self.row_ids = []
+        self.row_texts = []
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, item_id):
+        return item_id in self.order
+
+    def add(self, item, text=None):
+        if item.item_id in self.order:
+            self.remove(item.item_id)
+        if text is None:
+            text = normalize(item.description)
+        row = len(self.row_ids)
+        self.order[item.item_id] = row
+        self.row_ids.append(item.item_id)
+        self.row_texts.append(text)
+        for gram in token_grams(text):
+            bucket = self.postings.get(gram)
+            if bucket is None:
+                bucket = self.postings[gram] = array('I')
+            bucket.append(row)
+
+    def remove(self, item_id):
+        row = self.order.pop(item_id, None)
+        if row is None:
+            return
+        self.row_ids[row] = None
+        self.row_texts[row] = None
+        self.dead += 1
+        if self.dead >= max(MIN_COMPACT_ROWS, len(self.order)):
+            self.compact()
+
+    def compact(self):
+        renumbered = array('l', [-1]) * len(self.row_ids)
+        live = 0
+        for row, item_id in enumerate(self.row_ids):
+            if item_id is not None:
+                renumbered[row] = live
+                live += 1
+        for gram, bucket in list(self.postings.items()):
+            kept = array('I', [renumbered[row] for row in bucket if renumbered[row] >= 0])
+            if kept:
+                self.postings[gram] = kept
+            else:
+                del self.postings[gram]
+        self.row_ids = [item_id for item_id in self.row_ids if item_id is not None]
+        self.row_texts = [text for text in self.row_texts if text is not None]
+        self.order = {item_id: row for row, item_id in enumerate(self.row_ids)}
+        self.dead = 0
+
+    def estimate(self, term):
+        # Upper bound on the candidate count, or None when the term has no full gram
+        grams = token_grams(term)
+        if not grams:
+            return None
+        return min(len(self.postings.get(gram, ())) for gram in grams)
+
+    def contains(self, item_id, term):
+        return term in self.row_texts[self.order[item_id]]
+
+    def candidates(self, term):
+        # The matching item IDs in row order, or None when the term has no full gram and
+        # cannot be narrowed down by the index
+        grams = token_grams(term)
+        if not grams:
+            return None
+        buckets = []
+        for gram in grams:
+            bucket = self.postings.get(gram)
+            if not bucket:
+                return []
+            buckets.append(bucket)
+        # Every match holds every gram, so checking the text of each row in the shortest
+        # postings finds them all without intersecting the arrays
+        texts, row_ids = self.row_texts, self.row_ids
+        return [row_ids[row] for row in min(buckets, key=len) if texts[row] is not None and term in texts[row]]
+
+    def search_ids(self, term):
+        if not term:
+            return list(self.order)
+        matches = self.candidates(term)
+        if matches is None:
+            texts = self.row_texts
+            matches = [item_id for item_id, row in self.order.items() if term in texts[row]]
+        return matches
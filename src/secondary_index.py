@@ -0,0 +1,92 @@
+from bisect import bisect_left, bisect_right, insort
+
+# Sorts after any item ID, so (date, LAST_ID) closes an inclusive date range
+LAST_ID = "\uffff"
+
+
+class DateIndex:
+    def __init__(self):
+        self.entries = []
+        self.bulk = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, found_date, item_id):
+        if self.bulk:
+            self.entries.append((found_date, item_id))
+        else:
+            insort(self.entries, (found_date, item_id))
+
+    def finish_bulk(self):
+        self.entries.sort()
+        self.bulk = False
+
+    def remove(self, found_date, item_id):
+        entry = (found_date, item_id)
+        position = bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+            return True
+        return False
+
+    def bounds(self, start_date=None, end_date=None):
+        low = bisect_left(self.entries, (start_date,)) if start_date else 0
+        high = bisect_right(self.entries, (end_date, LAST_ID)) if end_date else len(self.entries)
+        return low, max(low, high)
+
+    def count(self, start_date=None, end_date=None):
+        low, high = self.bounds(start_date, end_date)
+        return high - low
+
+    def range(self, start_date=None, end_date=None):
+        low, high = self.bounds(start_date, end_date)
+        return [item_id for found_date, item_id in self.entries[low:high]]
+
+    def pop_before(self, found_date):
+        position = bisect_left(self.entries, (found_date,))
+        removed = self.entries[:position]
+        del self.entries[:position]
+        return [item_id for found_date, item_id in removed]
+
+
+class SecondaryIndex:
+    def __init__(self):
+        self.unclaimed_by_date = DateIndex()
+        self.claimed_by_date = DateIndex()
+        self.unclaimed_by_category = {}
+
+    def begin_bulk(self):
+        self.unclaimed_by_date.bulk = True
+        self.claimed_by_date.bulk = True
+
+    def finish_bulk(self):
+        self.unclaimed_by_date.finish_bulk()
+        self.claimed_by_date.finish_bulk()
+
+    def add(self, item):
+        if item.claimed:
+            self.claimed_by_date.add(item.found_date, item.item_id)
+        else:
+            self.unclaimed_by_date.add(item.found_date, item.item_id)
+            self.unclaimed_by_category.setdefault(item.category, set()).add(item.item_id)
+
+    def remove(self, item):
+        self.remove_unclaimed(item)
+        self.claimed_by_date.remove(item.found_date, item.item_id)
+
+    def remove_unclaimed(self, item):
+        removed = self.unclaimed_by_date.remove(item.found_date, item.item_id)
+        bucket = self.unclaimed_by_category.get(item.category)
+        if bucket is not None:
+            bucket.discard(item.item_id)
+            if not bucket:
+                del self.unclaimed_by_category[item.category]
+        return removed
+
+    def mark_claimed(self, item):
+        if self.remove_unclaimed(item):
+            self.claimed_by_date.add(item.found_date, item.item_id)
+
+    def category(self, category):
+        return self.unclaimed_by_category.get(category, set())
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import socket
+import threading
+import traceback
+from lost_and_found_system import Item, Claimant, SWEEP_INTERVAL
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Writes arriving within this many seconds of each other share one group commit
+BATCH_WINDOW = 0.002
+MAX_BATCH = 256
+# Operations that change data in bulk or return claimants' names, contacts and claim codes
+ADMIN_OPERATIONS = (
+    "get_claimant", "get_claimants", "list_claim_codes", "list_claims", "count_claims", "query_archive",
+    "metrics_report", "mark_claimed", "archive_old_claims", "expire_claims",
+)
+# A wrong admin password is answered after this many seconds, one attempt at a time across all clients
+LOGIN_DELAY = 1.0
+# Longest request line accepted; bulk reports send every row in one request
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+class ServiceError(Exception):
+    pass
+
+
+class LostAndFoundService:
+    # Serves one LostAndFoundSystem to many clients over newline-delimited JSON. Requests look
+    # like {"id": 1, "op": "search_item_ids", "args": {...}} and each gets one response line.
+    # A connection may only use ADMIN_OPERATIONS after check_admin_password succeeds on it, as
+    # the admin tab of a kiosk does. Traffic is not encrypted, so only listen beyond loopback
+    # on a network the kiosks trust
+    def __init__(self, system, batch_window=BATCH_WINDOW, login_delay=LOGIN_DELAY, max_request_bytes=MAX_REQUEST_BYTES):
+        self.system = system
+        self.batch_window = batch_window
+        self.login_delay = login_delay
+        self.max_request_bytes = max_request_bytes
+        self.login_lock = asyncio.Lock()
+        self.version = 0
+        self.pending_writes = None
+        self.server = None
+        self.reads = {
+            "search_item_ids": system.search_item_ids,
+            "search_ranked": lambda **args: [item.to_dict() for item in system.search_ranked(**args)],
+            "supports_ranked_search": system.supports_ranked_search,
+            "get_item": lambda item_id: self.to_dict(system.get_item(item_id)),
+            "get_items": lambda item_ids: [item.to_dict() for item in system.get_items(item_ids)],
+            "get_claimant": lambda claim_code: self.to_dict(system.get_claimant(claim_code)),
+            "get_claimants": lambda claim_codes: [claimant.to_dict() for claimant in system.get_claimants(claim_codes)],
+            "list_claim_codes": system.list_claim_codes,
+            "find_duplicates": lambda **args: [item.to_dict() for item in system.find_duplicates(**args)],
+            "list_claims": lambda **args: [claimant.to_dict() for claimant in system.list_claims(**args)],
+            "count_claims": system.count_claims,
+            "query_archive": system.query_archive,
+            "generate_item_id": system.generate_item_id,
+            "metrics_report": system.metrics_report,
+            "version": lambda: self.version,
+        }
+        self.writes = {
+            "add_item": lambda item: system.add_item(Item(**item)),
+            "report_lost_item": system.report_lost_item,
+            "report_lost_items_bulk": system.report_lost_items_bulk,
+            "verify_ownership_description": system.verify_ownership_description,
+            "mark_claimed": self.mark_claimed,
+            "claim_item": system.claim_item,
+            "archive_old_claims": system.archive_old_claims,
+            "expire_claims": system.expire_claims,
+        }
+
+    def to_dict(self, record):
+        return record.to_dict() if record is not None else None
+
+    def mark_claimed(self, item_id):
+        item = self.system.get_item(item_id)
+        return item is not None and not item.claimed and self.system.mark_claimed(item)
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        self.pending_writes = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self.write_loop())
+        self.sweeper_task = asyncio.create_task(self.sweep_loop())
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path, limit=self.max_request_bytes)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port, limit=self.max_request_bytes)
+        return self.server
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.writer_task.cancel()
+        self.sweeper_task.cancel()
+
+    async def handle_client(self, reader, writer):
+        session = {"admin": False}
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line is over the limit; what follows cannot be told apart from the next request
+                    await self.send(writer, {"id": None, "ok": False,
+                                             "error": f"Request is longer than {self.max_request_bytes} bytes."})
+                    break
+                if not line:
+                    break
+                # Requests on one connection may be pipelined; responses carry the request id
+                task = asyncio.create_task(self.respond(line, writer, session))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line, writer, session):
+        response = {"id": None}
+        try:
+            request = json.loads(line)
+            response["id"] = request.get("id")
+            response["result"] = await self.dispatch(request["op"], request.get("args", {}), session)
+            response["ok"] = True
+        except Exception as error:
+            response["ok"] = False
+            response["error"] = str(error)
+        await self.send(writer, response)
+
+    async def send(self, writer, response):
+        if not writer.is_closing():
+            writer.write((json.dumps(response, separators=(',', ':')) + "\n").encode())
+            await writer.drain()
+
+    async def dispatch(self, op, args, session):
+        if op == "check_admin_password":
+            return await self.login(args["password"], session)
+        if op in ADMIN_OPERATIONS and not session["admin"]:
+            raise ServiceError("Log in as admin first.")
+        if op in self.reads:
+            return self.reads[op](**args)
+        if op in self.writes:
+            return await self.queue_write(self.writes[op], args)
+        raise ServiceError(f"Unknown operation: {op}")
+
+    async def login(self, password, session):
+        # Attempts are checked one at a time, so pipelining guesses does not get around the delay
+        async with self.login_lock:
+            if self.system.check_admin_password(password):
+                session["admin"] = True
+                return True
+            await asyncio.sleep(self.login_delay)
+            return False
+
+    async def queue_write(self, handler, args):
+        future = asyncio.get_running_loop().create_future()
+        self.pending_writes.put_nowait((handler, args, future))
+        return await future
+
+    async def write_loop(self):
+        while True:
+            batch = [await self.pending_writes.get()]
+            await asyncio.sleep(self.batch_window)
+            while not self.pending_writes.empty() and len(batch) < MAX_BATCH:
+                batch.append(self.pending_writes.get_nowait())
+
+            outcomes = []
+            try:
+                with self.system.batch():
+                    for handler, args, future in batch:
+                        try:
+                            outcomes.append((future, handler(**args), None))
+                        except Exception as error:
+                            outcomes.append((future, None, error))
+            except Exception as error:
+                # The group did not reach the disk, so none of its writes may be reported as done
+                outcomes = [(future, None, error) for handler, args, future in batch]
+            self.version += 1
+
+            # Only answer once the whole group is durable
+            for future, result, error in outcomes:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    async def sweep_loop(self):
+        # Stale claim codes expire through the write queue like any other change
+        while True:
+            try:
+                await self.queue_write(self.writes["expire_claims"], {})
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(SWEEP_INTERVAL.total_seconds())
+
+
+def serve(system, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+    async def main():
+        server = await LostAndFoundService(system).start(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+class ServiceClient:
+    # Blocking client with the LostAndFoundSystem methods the UI uses, so the UI can run against a service
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        if path:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port))
+        self.file = self.socket.makefile('rb')
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.seen_version = None
+
+    def call(self, op, **args):
+        # The UI thread and the worker thread share the connection, one request at a time
+        with self.lock:
+            self.next_id += 1
+            request = {"id": self.next_id, "op": op, "args": args}
+            self.socket.sendall((json.dumps(request, separators=(',', ':')) + "\n").encode())
+            line = self.file.readline()
+        if not line:
+            raise ServiceError("The service closed the connection.")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise ServiceError(response["error"])
+        return response["result"]
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def sync(self):
+        version = self.call("version")
+        changed = self.seen_version is not None and version != self.seen_version
+        self.seen_version = version
+        return changed
+
+    def search_item_ids(self, search_term, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        return self.call("search_item_ids", search_term=search_term, category_filter=category_filter,
+                         date_filter=date_filter, start_date=start_date, end_date=end_date)
+
+    def search_ranked(self, search_term, limit=10, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        records = self.call("search_ranked", search_term=search_term, limit=limit, category_filter=category_filter,
+                            date_filter=date_filter, start_date=start_date, end_date=end_date)
+        return [Item(**record) for record in records]
+
+    def supports_ranked_search(self):
+        return self.call("supports_ranked_search")
+
+    def get_item(self, item_id):
+        record = self.call("get_item", item_id=str(item_id))
+        return Item(**record) if record else None
+
+    def get_items(self, item_ids):
+        return [Item(**record) for record in self.call("get_items", item_ids=list(item_ids))]
+
+    def get_claimant(self, claim_code):
+        record = self.call("get_claimant", claim_code=claim_code)
+        return Claimant(**record) if record else None
+
+    def get_claimants(self, claim_codes):
+        return [Claimant(**record) for record in self.call("get_claimants", claim_codes=list(claim_codes))]
+
+    def list_claim_codes(self):
+        return self.call("list_claim_codes")
+
+    def find_duplicates(self, description, found_date, category):
+        return [Item(**record) for record in self.call("find_duplicates", description=description, found_date=found_date,
+                                                       category=category)]
+
+    def list_claims(self, state, offset=0, limit=100):
+        return [Claimant(**record) for record in self.call("list_claims", state=state, offset=offset, limit=limit)]
+
+    def count_claims(self, state):
+        return self.call("count_claims", state=state)
+
+    def query_archive(self, search_term="", start_date=None, end_date=None, category_filter=None):
+        return self.call("query_archive", search_term=search_term, start_date=start_date, end_date=end_date,
+                         category_filter=category_filter)
+
+    def check_admin_password(self, password):
+        return self.call("check_admin_password", password=password)
+
+    def generate_item_id(self):
+        return self.call("generate_item_id")
+
+    def metrics_report(self):
+        return self.call("metrics_report")
+
+    def add_item(self, item):
+        return self.call("add_item", item=item.to_dict())
+
+    def report_lost_item(self, description, location, found_date, category, check_duplicates=True):
+        return self.call("report_lost_item", description=description, location=location, found_date=found_date,
+                         category=category, check_duplicates=check_duplicates)
+
+    def report_lost_items_bulk(self, records):
+        return self.call("report_lost_items_bulk", records=list(records))
+
+    def verify_ownership_description(self, item_id, description, name, contact):
+        return self.call("verify_ownership_description", item_id=str(item_id), description=description, name=name,
+                         contact=contact)
+
+    def mark_claimed(self, item):
+        if not self.call("mark_claimed", item_id=item.item_id):
+            return False
+        item.claimed = True
+        item.status = "Claimed"
+        return True
+
+    def claim_item(self, claim_code):
+        return self.call("claim_item", claim_code=claim_code)
+
+    def archive_old_claims(self):
+        return self.call("archive_old_claims")
+
+    def expire_claims(self):
+        return self.call("expire_claims")
@@ -0,0 +1,134 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections.abc import MutableMapping
+
+MAGIC = b"FINDIT\x00\x02"
+# magic, item count, offset table position, id table position and length, claimants position and length.
+# A claimed flag per item follows the claimants
+HEADER = struct.Struct("<8sQQQQQQ")
+ITEM_FIELDS = ("item_id", "description", "location", "found_date", "category", "claimed", "status")
+CLAIMANT_FIELDS = ("item_id", "claim_code", "name", "contact", "issued_at", "state", "resolved_at")
+
+
+def write_snapshot(path, items, claimants):
+    temp_path = path + ".tmp"
+    offsets = array('Q')
+    item_ids = []
+    claimed = bytearray()
+    with open(temp_path, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        position = HEADER.size
+        for item in items:
+            record = json.dumps([item[field] for field in ITEM_FIELDS], separators=(',', ':')).encode()
+            offsets.append(position)
+            f.write(record)
+            position += len(record)
+            item_ids.append(item["item_id"])
+            claimed.append(bool(item["claimed"]))
+        offsets.append(position)
+
+        offsets_position = position
+        f.write(offsets.tobytes())
+        ids_position = offsets_position + len(offsets) * offsets.itemsize
+        ids_blob = "\n".join(item_ids).encode()
+        f.write(ids_blob)
+        claimants_position = ids_position + len(ids_blob)
+        claimants_blob = json.dumps([[claimant[field] for field in CLAIMANT_FIELDS] for claimant in claimants],
+                                    separators=(',', ':')).encode()
+        f.write(claimants_blob)
+        f.write(claimed)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(item_ids), offsets_position, ids_position, len(ids_blob),
+                            claimants_position, len(claimants_blob)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def is_snapshot(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class SnapshotReader:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.item_count, offsets_position, self.ids_position, self.ids_length,
+         self.claimants_position, self.claimants_length) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a snapshot file")
+        self.offsets = array('Q')
+        self.offsets.frombytes(self.map[offsets_position:offsets_position + (self.item_count + 1) * self.offsets.itemsize])
+
+    def item_ids(self):
+        if not self.item_count:
+            return []
+        return self.map[self.ids_position:self.ids_position + self.ids_length].decode().split("\n")
+
+    def claimed_flags(self):
+        flags_position = self.claimants_position + self.claimants_length
+        return self.map[flags_position:flags_position + self.item_count]
+
+    def record(self, index):
+        values = json.loads(self.map[self.offsets[index]:self.offsets[index + 1]])
+        return dict(zip(ITEM_FIELDS, values))
+
+    def claimants(self):
+        rows = json.loads(self.map[self.claimants_position:self.claimants_position + self.claimants_length])
+        return [dict(zip(CLAIMANT_FIELDS, row)) for row in rows]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class LazyItems(MutableMapping):
+    # Maps item_id to Item, building each Item from the snapshot the first time it is read
+    def __init__(self, reader, factory):
+        self.reader = reader
+        self.factory = factory
+        self.entries = dict(zip(reader.item_ids(), range(reader.item_count)))
+        self.lock = threading.Lock()
+
+    def __getitem__(self, item_id):
+        value = self.entries[item_id]
+        if isinstance(value, int):
+            # The UI reads pages while the worker thread builds indexes; both must get the same Item
+            with self.lock:
+                value = self.entries[item_id]
+                if isinstance(value, int):
+                    value = self.entries[item_id] = self.factory(**self.reader.record(value))
+        return value
+
+    def __setitem__(self, item_id, item):
+        self.entries[item_id] = item
+
+    def __delitem__(self, item_id):
+        del self.entries[item_id]
+
+    def __contains__(self, item_id):
+        return item_id in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def unclaimed_ids(self):
+        # Answers the unfiltered listing from the flags alone, without building any item
+        flags = self.reader.claimed_flags()
+        return [item_id for item_id, value in self.entries.items()
+                if not (flags[value] if isinstance(value, int) else value.claimed)]
+
+    def detach(self):
+        items = {item_id: self[item_id] for item_id in self.entries}
+        self.reader.close()
+        return items
@@ -0,0 +1,435 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from journal import Journal
+from locking import FileLock
+from snapshot import SnapshotReader, is_snapshot, write_snapshot
+from claim_index import timestamp
+from duplicate_index import open_saved, signature, band_keys, date_window
+
+
+class JsonStorage:
+    queryable = False
+
+    def __init__(self, items_file="items.json", claimants_file="claimants.json", journal=True, checkpoint_interval=1000,
+                 snapshot=False, shared=False):
+        self.items_file = items_file
+        self.claimants_file = claimants_file
+        base_path = os.path.splitext(items_file)[0]
+        # Processes sharing the files see each other's changes through the journal, so sharing needs one
+        self.journal = Journal(base_path + ".journal") if journal or shared else None
+        self.checkpoint_interval = checkpoint_interval
+        self.snapshot_file = base_path + ".snapshot" if snapshot else None
+        self.shared = shared
+        self.file_lock = FileLock(base_path + ".lock") if shared else None
+        self.version_file = base_path + ".version"
+        self.duplicates_file = base_path + ".duplicates"
+        self.checkpoint = 0
+
+    def lock(self):
+        return self.file_lock if self.shared else nullcontext()
+
+    def read_checkpoint(self):
+        # Counts full saves; a change means the journal was folded into rewritten files
+        try:
+            with open(self.version_file, 'r') as f:
+                return json.load(f)["checkpoint"]
+        except FileNotFoundError:
+            return 0
+
+    def has_changes(self):
+        # Cheap enough to poll: one small read and one stat
+        if not self.shared:
+            return False
+        return self.read_checkpoint() != self.checkpoint or self.journal.size() != self.journal.offset
+
+    def changes(self):
+        # Called with the lock held; None means the caller must reload everything
+        if not self.shared:
+            return []
+        if self.read_checkpoint() != self.checkpoint or self.journal.size() < self.journal.offset:
+            return None
+        return self.journal.read_new()
+
+    def snapshot_is_current(self):
+        if self.snapshot_file is None or not os.path.exists(self.snapshot_file):
+            return False
+        if not is_snapshot(self.snapshot_file):
+            # Written in an older format; the next save replaces it
+            return False
+        snapshot_time = os.path.getmtime(self.snapshot_file)
+        # Fall back to the JSON files if they were changed after the snapshot was written
+        return all(not os.path.exists(path) or os.path.getmtime(path) <= snapshot_time
+                   for path in (self.items_file, self.claimants_file))
+
+    def load_duplicates(self, item_count):
+        # The saved duplicate index, or None when it is missing or older than the items it describes
+        if not os.path.exists(self.duplicates_file):
+            return None
+        if os.path.exists(self.items_file) and os.path.getmtime(self.items_file) > os.path.getmtime(self.duplicates_file):
+            return None
+        return open_saved(self.duplicates_file, item_count)
+
+    def save_duplicates(self, duplicates, item_count):
+        # item_count is the number of items in the files the index was built on top of
+        duplicates.save(self.duplicates_file, item_count)
+
+    def load(self):
+        items, claimants, changes = [], [], []
+        if self.shared:
+            self.checkpoint = self.read_checkpoint()
+        if self.snapshot_is_current():
+            items = SnapshotReader(self.snapshot_file)
+            claimants = items.claimants()
+            if self.journal is not None:
+                changes = self.journal.replay()
+            return items, claimants, changes
+
+        try:
+            with open(self.items_file, 'r') as f:
+                items = json.load(f)
+        except FileNotFoundError:
+            print("No items data found.")
+
+        try:
+            with open(self.claimants_file, 'r') as f:
+                claimants = json.load(f)
+        except FileNotFoundError:
+            print("No claimants data found.")
+
+        if self.journal is not None:
+            changes = self.journal.replay()
+        return items, claimants, changes
+
+    def record(self, op, data, durable=True):
+        # Returns True when the caller should write a full snapshot
+        if self.journal is None:
+            return True
+        self.journal.append(op, data, durable)
+        return self.journal.records >= self.checkpoint_interval
+
+    def flush(self):
+        # Makes records written with durable=False durable
+        if self.journal is not None:
+            self.journal.sync()
+
+    def save(self, items, claimants, duplicates=None):
+        self.write_json(self.items_file, items)
+        self.write_json(self.claimants_file, claimants)
+        if self.snapshot_file is not None:
+            self.write_snapshot(items, claimants)
+        if duplicates is not None:
+            self.save_duplicates(duplicates, len(items))
+        if self.shared:
+            self.checkpoint = self.read_checkpoint() + 1
+            self.write_json(self.version_file, {"checkpoint": self.checkpoint})
+        if self.journal is not None:
+            self.journal.truncate()
+
+    def ensure_snapshot(self, items, claimants):
+        # Data from before snapshots were enabled, or not yet folded by a checkpoint, would
+        # otherwise be loaded from the JSON files on every start
+        if self.snapshot_file is None or not items or self.snapshot_is_current():
+            return
+        self.write_snapshot(items, claimants)
+
+    def write_snapshot(self, items, claimants):
+        try:
+            write_snapshot(self.snapshot_file, items, claimants)
+        except PermissionError:
+            # On Windows a process still mapping the old snapshot blocks the swap. The JSON
+            # files are newer, so loads fall back to them until the next save
+            pass
+
+    def write_json(self, path, data):
+        # Write a sibling file and swap it in so a crash never leaves a truncated dataset
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+# Stays under SQLite's default limit on bound parameters per statement
+MAX_PARAMETERS = 500
+
+ITEM_COLUMNS = ("item_id", "description", "location", "found_date", "category", "claimed", "status")
+CLAIMANT_COLUMNS = ("item_id", "claim_code", "name", "contact", "issued_at", "state", "resolved_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL,
+    location TEXT,
+    found_date TEXT,
+    category TEXT,
+    claimed INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    search_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_category ON items (category, claimed);
+CREATE INDEX IF NOT EXISTS items_found_date ON items (found_date);
+CREATE INDEX IF NOT EXISTS items_claimed ON items (claimed, found_date);
+CREATE TABLE IF NOT EXISTS claimants (
+    claim_code TEXT PRIMARY KEY,
+    item_id TEXT NOT NULL,
+    name TEXT,
+    contact TEXT,
+    issued_at TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    resolved_at TEXT
+);
+CREATE INDEX IF NOT EXISTS claimants_item_id ON claimants (item_id);
+CREATE TABLE IF NOT EXISTS duplicate_keys (
+    category TEXT NOT NULL,
+    date_window INTEGER NOT NULL,
+    band_key INTEGER NOT NULL,
+    item_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS duplicate_keys_bucket ON duplicate_keys (category, date_window, band_key);
+CREATE INDEX IF NOT EXISTS duplicate_keys_item_id ON duplicate_keys (item_id);
+"""
+# Bumped by upgrade_schema once older data has been brought up to date
+SCHEMA_VERSION = 1
+# Created after upgrade_schema, since older databases lack the columns until then
+CLAIMANT_STATE_INDEX = "CREATE INDEX IF NOT EXISTS claimants_state ON claimants (state, issued_at, claim_code)"
+CLAIMANT_RESOLVED_INDEX = "CREATE INDEX IF NOT EXISTS claimants_resolved ON claimants (state, resolved_at)"
+
+
+class SqliteStorage:
+    queryable = True
+
+    def __init__(self, path="findit.db"):
+        self.path = path
+        # Reads may come from the UI thread while writes run on a background worker
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        self.upgrade_schema()
+        self.data_version = self.read_data_version()
+        self.lock_depth = 0
+
+    def upgrade_schema(self):
+        # Claims in databases made before codes expired start their collection window now
+        columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(claimants)")}
+        if "issued_at" not in columns:
+            with self.connection:
+                for column in ("issued_at TEXT", "state TEXT NOT NULL DEFAULT 'pending'", "resolved_at TEXT"):
+                    self.connection.execute(f"ALTER TABLE claimants ADD COLUMN {column}")
+                self.connection.execute("UPDATE claimants SET issued_at = ?", (timestamp(),))
+        self.connection.execute(CLAIMANT_STATE_INDEX)
+        self.connection.execute(CLAIMANT_RESOLVED_INDEX)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Unclaimed items from before duplicate detection get their LSH keys
+            with self.connection:
+                self.connection.execute("DELETE FROM duplicate_keys")
+                self.insert_duplicate_keys(self.item_record(row) for row in self.connection.execute("SELECT * FROM items WHERE claimed = 0"))
+                self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def lock(self):
+        # Takes the database write lock up front so a check and the write that depends on it are atomic
+        if self.lock_depth == 0:
+            self.connection.execute("BEGIN IMMEDIATE")
+        self.lock_depth += 1
+        try:
+            yield
+        except BaseException:
+            self.lock_depth -= 1
+            if self.lock_depth == 0:
+                self.connection.rollback()
+            raise
+        self.lock_depth -= 1
+        if self.lock_depth == 0 and self.connection.in_transaction:
+            self.connection.commit()
+
+    def read_data_version(self):
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def has_changes(self):
+        # data_version moves when another connection commits
+        data_version = self.read_data_version()
+        changed = data_version != self.data_version
+        self.data_version = data_version
+        return changed
+
+    def changes(self):
+        # Every read goes to the database, so there is nothing to catch up on
+        return []
+
+    def flush(self):
+        # Records are committed when lock() is released
+        pass
+
+    def record(self, op, data, durable=True):
+        # Under lock() the write joins the open transaction, which commits when the lock is released
+        with nullcontext() if self.lock_depth else self.connection:
+            if op == "add_item":
+                self.insert_items([data])
+            elif op == "add_items":
+                self.insert_items(data["items"])
+            elif op == "claim_item":
+                self.connection.execute(
+                    "UPDATE items SET claimed = 1, status = 'Claimed' WHERE item_id = ?", (data["item_id"],))
+                self.connection.execute("DELETE FROM duplicate_keys WHERE item_id = ?", (data["item_id"],))
+                if data.get("claim_code"):
+                    self.connection.execute(
+                        "UPDATE claimants SET state = CASE WHEN claim_code = ? THEN 'collected' ELSE 'expired' END, "
+                        "resolved_at = ? WHERE item_id = ? AND state = 'pending'",
+                        (data["claim_code"], data["claimed_at"], data["item_id"]))
+            elif op == "expire_claims":
+                self.connection.executemany(
+                    "UPDATE claimants SET state = 'expired', resolved_at = ? WHERE claim_code = ? AND state = 'pending'",
+                    [(data["expired_at"], claim_code) for claim_code in data["claim_codes"]])
+            elif op == "purge_claims":
+                self.connection.executemany("DELETE FROM claimants WHERE claim_code = ?",
+                                            [(claim_code,) for claim_code in data["claim_codes"]])
+            elif op == "add_claimant":
+                self.insert_claimants([data])
+            elif op == "archive_items":
+                archived = [(item_id,) for item_id in data["item_ids"]]
+                self.connection.executemany("DELETE FROM items WHERE item_id = ?", archived)
+                self.connection.executemany("DELETE FROM claimants WHERE item_id = ?", archived)
+                self.connection.executemany("DELETE FROM duplicate_keys WHERE item_id = ?", archived)
+        return False
+
+    def insert_items(self, items):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO items (item_id, description, location, found_date, category, claimed, status, search_text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [tuple(item[column] for column in ITEM_COLUMNS) + (item["description"].lower(),) for item in items])
+        # Replaced items drop their old keys; only unclaimed items can be reported twice
+        self.connection.executemany("DELETE FROM duplicate_keys WHERE item_id = ?", [(item["item_id"],) for item in items])
+        self.insert_duplicate_keys(item for item in items if not item["claimed"])
+
+    def insert_duplicate_keys(self, items):
+        rows = []
+        for item in items:
+            values = signature(item["description"])
+            if values is not None:
+                window = date_window(item["found_date"])
+                rows.extend((item["category"], window, key, item["item_id"]) for key in band_keys(values))
+        self.connection.executemany(
+            "INSERT INTO duplicate_keys (category, date_window, band_key, item_id) VALUES (?, ?, ?, ?)", rows)
+
+    def insert_claimants(self, claimants):
+        # Records from before claim codes expired lack the lifecycle fields
+        defaults = {"issued_at": timestamp(), "state": "pending", "resolved_at": None}
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO claimants (item_id, claim_code, name, contact, issued_at, state, resolved_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [tuple(defaults.get(column) if claimant.get(column) is None else claimant[column] for column in CLAIMANT_COLUMNS)
+             for claimant in claimants])
+
+    def import_records(self, items, claimants):
+        with self.connection:
+            self.insert_items(items)
+            self.insert_claimants(claimants)
+
+    def item_record(self, row):
+        record = {column: row[column] for column in ITEM_COLUMNS}
+        record["claimed"] = bool(record["claimed"])
+        return record
+
+    def claimant_record(self, row):
+        return {column: row[column] for column in CLAIMANT_COLUMNS}
+
+    def get_item(self, item_id):
+        row = self.connection.execute("SELECT * FROM items WHERE item_id = ?", (item_id,)).fetchone()
+        return self.item_record(row) if row else None
+
+    def get_claimant(self, claim_code):
+        row = self.connection.execute("SELECT * FROM claimants WHERE claim_code = ?", (claim_code,)).fetchone()
+        return self.claimant_record(row) if row else None
+
+    def select_in(self, table, column, values):
+        rows = {}
+        for start in range(0, len(values), MAX_PARAMETERS):
+            chunk = values[start:start + MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in self.connection.execute(f"SELECT * FROM {table} WHERE {column} IN ({placeholders})", chunk):
+                rows[row[column]] = row
+        return [rows[value] for value in values if value in rows]
+
+    def get_items(self, item_ids):
+        return [self.item_record(row) for row in self.select_in("items", "item_id", list(item_ids))]
+
+    def get_claimants(self, claim_codes):
+        return [self.claimant_record(row) for row in self.select_in("claimants", "claim_code", list(claim_codes))]
+
+    def claimants_for_item(self, item_id):
+        rows = self.connection.execute("SELECT * FROM claimants WHERE item_id = ? ORDER BY rowid", (item_id,))
+        return [self.claimant_record(row) for row in rows]
+
+    def search_clauses(self, search_term, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        clauses, params = ["claimed = 0"], []
+        if search_term:
+            clauses.append("instr(search_text, ?) > 0")
+            params.append(search_term)
+        if category_filter:
+            clauses.append("category = ?")
+            params.append(category_filter)
+        if date_filter:
+            clauses.append("found_date = ?")
+            params.append(date_filter)
+        if start_date:
+            clauses.append("found_date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("found_date <= ?")
+            params.append(end_date)
+        return " AND ".join(clauses), params
+
+    def search(self, search_term, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        where, params = self.search_clauses(search_term, category_filter, date_filter, start_date, end_date)
+        rows = self.connection.execute(f"SELECT * FROM items WHERE {where} ORDER BY seq", params)
+        return [self.item_record(row) for row in rows]
+
+    def search_ids(self, search_term, category_filter=None, date_filter=None, start_date=None, end_date=None):
+        where, params = self.search_clauses(search_term, category_filter, date_filter, start_date, end_date)
+        return [row[0] for row in self.connection.execute(f"SELECT item_id FROM items WHERE {where} ORDER BY seq", params)]
+
+    def claimed_items_before(self, found_date):
+        rows = self.connection.execute("SELECT * FROM items WHERE claimed = 1 AND found_date < ? ORDER BY found_date", (found_date,))
+        return [self.item_record(row) for row in rows]
+
+    def duplicate_candidates(self, category, windows, keys):
+        rows = self.connection.execute(
+            f"SELECT DISTINCT item_id FROM duplicate_keys WHERE category = ? AND date_window IN ({', '.join('?' * len(windows))}) "
+            f"AND band_key IN ({', '.join('?' * len(keys))})", [category, *windows, *keys])
+        return [row[0] for row in rows]
+
+    def claims_before(self, state, issued_before):
+        rows = self.connection.execute(
+            "SELECT claim_code FROM claimants WHERE state = ? AND issued_at < ? ORDER BY issued_at", (state, issued_before))
+        return [row[0] for row in rows]
+
+    def expired_before(self, resolved_before):
+        rows = self.connection.execute(
+            "SELECT claim_code FROM claimants WHERE state = 'expired' AND resolved_at < ? ORDER BY resolved_at",
+            (resolved_before,))
+        return [row[0] for row in rows]
+
+    def claims_page(self, state, offset, limit):
+        rows = self.connection.execute(
+            "SELECT * FROM claimants WHERE state = ? ORDER BY issued_at DESC, claim_code DESC LIMIT ? OFFSET ?",
+            (state, limit, offset))
+        return [self.claimant_record(row) for row in rows]
+
+    def count_claims(self, state):
+        return self.connection.execute("SELECT COUNT(*) FROM claimants WHERE state = ?", (state,)).fetchone()[0]
+
+    def item_ids(self):
+        return (row[0] for row in self.connection.execute("SELECT item_id FROM items"))
+
+    def claim_codes(self):
+        return (row[0] for row in self.connection.execute("SELECT claim_code FROM claimants ORDER BY rowid"))
+
+    def iter_items(self):
+        return (self.item_record(row) for row in self.connection.execute("SELECT * FROM items ORDER BY seq"))
+
+    def iter_claimants(self):
+        return (self.claimant_record(row) for row in self.connection.execute("SELECT * FROM claimants ORDER BY rowid"))
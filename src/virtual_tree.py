@@ -0,0 +1,133 @@
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+WHEEL_STEP = 3
+
+
+class VirtualTree:
+    # A Treeview that only holds rows for the visible window of a long list of keys;
+    # fetch_rows(keys) returns {key: values} for the keys that still exist. Given a worker,
+    # fetch_rows runs on it and the window is drawn when the rows arrive
+    def __init__(self, parent, columns, headings, fetch_rows, height=10, worker=None):
+        self.frame = ttk.Frame(parent, style='Custom.TFrame')
+        self.tree = ttk.Treeview(self.frame, columns=columns, show='headings', height=height, selectmode='browse')
+        for column, heading in zip(columns, headings):
+            self.tree.heading(column, text=heading)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scroll)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.fetch_rows = fetch_rows
+        self.worker = worker
+        self.keys = []
+        self.key_set = set()
+        self.offset = 0
+        self.visible_rows = height
+        self.shown = {}
+        self.selected = None
+        self.select_callback = None
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_by(-WHEEL_STEP if event.delta > 0 else WHEEL_STEP))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_by(-WHEEL_STEP))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_by(WHEEL_STEP))
+        self.tree.bind('<Prior>', lambda event: self.scroll_by(-self.visible_rows))
+        self.tree.bind('<Next>', lambda event: self.scroll_by(self.visible_rows))
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def bind_select(self, callback):
+        self.select_callback = callback
+
+    def selection(self):
+        return self.selected
+
+    def set_keys(self, keys, reset=False):
+        # Rows that are still visible are kept and only updated when their values changed
+        self.keys = list(keys)
+        self.key_set = set(self.keys)
+        if reset:
+            self.offset = 0
+        if self.selected is not None and self.selected not in self.key_set:
+            self.set_selected(None)
+        self.scroll_to(self.offset, force=True)
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def scroll_to(self, offset, force=False):
+        offset = max(0, min(offset, len(self.keys) - self.visible_rows))
+        if offset != self.offset or force:
+            self.offset = offset
+            self.render()
+
+    def render(self):
+        window = self.keys[self.offset:self.offset + self.visible_rows]
+        if self.worker is None:
+            self.show_rows(window, self.fetch_rows(window) if window else {})
+        else:
+            # Rows on screen stay until the new ones arrive; a newer window supersedes older ones
+            self.worker.submit(self.fetch_rows, window, on_done=lambda rows: self.show_rows(window, rows), channel=self)
+            self.update_scrollbar()
+
+    def show_rows(self, window, rows):
+        for key in list(self.shown):
+            if key not in rows:
+                self.tree.delete(key)
+                del self.shown[key]
+
+        index = 0
+        for key in window:
+            values = rows.get(key)
+            if values is None:
+                continue
+            if key not in self.shown:
+                self.tree.insert('', index, iid=key, values=values)
+            else:
+                if self.shown[key] != values:
+                    self.tree.item(key, values=values)
+                if self.tree.index(key) != index:
+                    self.tree.move(key, '', index)
+            self.shown[key] = values
+            index += 1
+
+        if self.selected in self.shown and self.tree.selection() != (self.selected,):
+            self.tree.selection_set(self.selected)
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = len(self.keys)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_rows) / total)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.keys)))
+        elif action == 'scroll':
+            step = self.visible_rows if unit == 'pages' else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT)
+        # One row's worth of height goes to the headings
+        visible_rows = max(1, event.height // row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.scroll_to(self.offset, force=True)
+
+    def on_select(self, event):
+        # Rows scrolled out of the window drop out of the Treeview selection but stay selected here
+        selection = self.tree.selection()
+        if selection and selection[0] != self.selected:
+            self.set_selected(selection[0])
+
+    def set_selected(self, key):
+        self.selected = key
+        if self.select_callback is not None:
+            self.select_callback()
@@ -0,0 +1,32 @@
+import os
+import sys
+import pytest
+
+# The modules live flat in src/ and import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from archive_store import ArchiveStore
+from lost_and_found_system import LostAndFoundSystem, Item
+from storage import JsonStorage
+
+
+@pytest.fixture
+def open_system(tmp_path):
+    # Every system a test opens shares its data directory, as kiosks share a folder
+    def open_system(**storage_args):
+        storage = JsonStorage(str(tmp_path / "items.json"), str(tmp_path / "claimants.json"), **storage_args)
+        return LostAndFoundSystem(storage=storage, archive_store=ArchiveStore(str(tmp_path / "archive")))
+    return open_system
+
+
+@pytest.fixture
+def open_kiosk(open_system):
+    # Configured as the UI configures its storage
+    return lambda: open_system(snapshot=True, shared=True)
+
+
+@pytest.fixture
+def report():
+    def report(system, description):
+        return system.add_item(Item(system.generate_item_id(), description, "Library", "2025-03-10", "Accessories"))
+    return report
@@ -0,0 +1,7 @@
+from bulk_io import read_records
+
+
+def test_csv_byte_order_mark_is_not_part_of_the_first_header(tmp_path):
+    path = tmp_path / "items.csv"
+    path.write_bytes("description,location\r\nblack leather wallet,Library\r\n".encode("utf-8-sig"))
+    assert list(read_records(str(path))) == [{"description": "black leather wallet", "location": "Library"}]
@@ -0,0 +1,92 @@
+import json
+
+
+def test_changes_are_journaled_not_rewritten(tmp_path, open_system, report):
+    system = open_system()
+    report(system, "black leather wallet with cards")
+    assert not (tmp_path / "items.json").exists()
+    assert len((tmp_path / "items.journal").read_text().splitlines()) == 1
+
+
+def test_replay_restores_journaled_changes(open_system, report):
+    system = open_system()
+    first = report(system, "black leather wallet with cards")
+    second = report(system, "blue umbrella with a wooden handle")
+    system.mark_claimed(system.get_item(first))
+
+    reloaded = open_system()
+    assert sorted(reloaded.items) == sorted([first, second])
+    assert reloaded.get_item(first).claimed
+    assert not reloaded.get_item(second).claimed
+
+
+def test_torn_record_is_dropped_on_replay(tmp_path, open_system, report):
+    system = open_system()
+    kept = report(system, "black leather wallet with cards")
+    journal = tmp_path / "items.journal"
+    valid_length = journal.stat().st_size
+    # A crash in the middle of an append leaves a record without its end
+    with open(journal, "ab") as f:
+        f.write(b'{"op":"add_item","data":{"item_id":"999","descr')
+
+    reloaded = open_system()
+    assert list(reloaded.items) == [kept]
+    assert journal.stat().st_size == valid_length
+
+    # New records start on a clean line and survive the next replay
+    added = report(reloaded, "silver casio calculator with initials")
+    assert sorted(open_system().items) == sorted([kept, added])
+
+
+def test_checkpoint_folds_journal_into_files(tmp_path, open_system, report):
+    system = open_system(checkpoint_interval=2)
+    item_ids = [report(system, f"red folding umbrella number {n}") for n in range(3)]
+
+    with open(tmp_path / "items.json") as f:
+        assert [item["item_id"] for item in json.load(f)] == item_ids[:2]
+    assert len((tmp_path / "items.journal").read_text().splitlines()) == 1
+    assert sorted(open_system().items) == sorted(item_ids)
+
+
+def test_checkpoint_replayed_twice_is_harmless(tmp_path, open_system, report):
+    # A crash between writing the files and truncating the journal replays records already saved
+    system = open_system()
+    item_id = report(system, "black leather wallet with cards")
+    journal = (tmp_path / "items.journal").read_bytes()
+    system.save_data()
+    (tmp_path / "items.journal").write_bytes(journal)
+
+    reloaded = open_system()
+    assert list(reloaded.items) == [item_id]
+
+
+def test_missing_snapshot_is_written_on_load(tmp_path, open_system, report):
+    system = open_system(snapshot=True)
+    first = report(system, "black leather wallet with cards")
+    second = report(system, "blue umbrella with a wooden handle")
+    system.mark_claimed(system.get_item(first))
+    assert not (tmp_path / "items.snapshot").exists()
+
+    open_system(snapshot=True)
+    assert (tmp_path / "items.snapshot").exists()
+
+    reloaded = open_system(snapshot=True)
+    assert reloaded.search_item_ids("") == [second]
+    assert not reloaded.indexes_ready
+
+
+def test_duplicate_index_is_saved_once_built(tmp_path, open_system, report):
+    system = open_system()
+    report(system, "black leather wallet with cards")
+    system.find_duplicates("black leather wallet with two cards", "2025-03-10", "Accessories")
+    assert (tmp_path / "items.duplicates").exists()
+    # Journaled after the index was saved; replay brings the saved copy up to date
+    later = report(system, "black leather wallet with the cards")
+
+    reloaded = open_system()
+    assert reloaded.duplicate_index is not None
+    found = reloaded.find_duplicates("black leather wallet with two cards", "2025-03-10", "Accessories")
+    reloaded.duplicate_index = None
+    rebuilt = reloaded.find_duplicates("black leather wallet with two cards", "2025-03-10", "Accessories")
+    assert later in {item.item_id for item in found}
+    assert [item.item_id for item in found] == [item.item_id for item in rebuilt]
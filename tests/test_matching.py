@@ -0,0 +1,73 @@
+import random
+from difflib import SequenceMatcher
+import pytest
+from matching import AUTOJUNK_LENGTH, DescriptionMatcher, MATCH_THRESHOLD
+
+WORDS = "black leather wallet with cards blue hydro flask tumbler stickers silver casio calculator initials".split()
+
+
+def description(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def pairs(seed, count):
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = description(rng, rng.randint(1, 12))
+        kind = rng.randrange(4)
+        if kind == 0:
+            query = description(rng, rng.randint(1, 12))
+        elif kind == 1:
+            # Part of the stored text, which takes the containment shortcut
+            words = text.split()
+            start = rng.randrange(len(words))
+            query = " ".join(words[start:start + rng.randint(1, len(words))])
+        elif kind == 2:
+            # A reworded copy: a few words dropped or swapped
+            query = " ".join(word for word in text.split() if rng.random() > 0.3) or text
+        else:
+            query = text[:rng.randint(0, len(text))]
+        yield query, text
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_decisions_match_sequence_matcher(seed):
+    matcher = DescriptionMatcher()
+    for query, text in pairs(seed, 2000):
+        ratio = SequenceMatcher(None, query, text).ratio()
+        assert matcher.is_match(query, text) == (ratio >= MATCH_THRESHOLD), (query, text)
+
+
+@pytest.mark.parametrize("floor", [0.3, MATCH_THRESHOLD, 0.9])
+def test_scores_match_sequence_matcher(floor):
+    matcher = DescriptionMatcher()
+    for query, text in pairs(7, 2000):
+        ratio = SequenceMatcher(None, query, text).ratio()
+        expected = ratio if ratio >= floor else None
+        assert matcher.score(query, text, floor) == expected, (query, text)
+
+
+def test_long_texts_keep_sequence_matcher_junk_rules():
+    # Past AUTOJUNK_LENGTH SequenceMatcher ignores popular characters, so containment no longer decides
+    rng = random.Random(3)
+    matcher = DescriptionMatcher()
+    for _ in range(300):
+        text = description(rng, 40)
+        assert len(text) >= AUTOJUNK_LENGTH
+        words = text.split()
+        start = rng.randrange(len(words))
+        query = " ".join(words[start:start + rng.randint(20, 40)])
+        ratio = SequenceMatcher(None, query, text).ratio()
+        assert matcher.is_match(query, text) == (ratio >= MATCH_THRESHOLD), (query, text)
+
+
+def test_matches_normalizes_like_the_original_check():
+    class Entry:
+        item_id = "1"
+        description = "Black Leather Wallet with Cards"
+
+    matcher = DescriptionMatcher()
+    for query in ("black leather wallet", "BLACK LEATHER WALLET WITH CARDS", "blue tumbler"):
+        # The original check in verify_ownership_description
+        expected = SequenceMatcher(None, query.lower(), Entry.description.lower()).ratio() >= 0.6
+        assert matcher.matches(Entry, query) == expected
@@ -0,0 +1,16 @@
+from lost_and_found_system import Item
+from metrics import Metrics
+
+
+def test_every_report_path_counts_reported_items(open_system):
+    metrics = Metrics()
+    system = open_system()
+    metrics.attach(system)
+    system.report_lost_item("black leather wallet with cards", "Library", "2025-03-10", "Accessories")
+    system.report_lost_item("blue umbrella with a wooden handle", "Gym", "2025-03-10", "Accessories", check_duplicates=False)
+    system.add_item(Item(system.generate_item_id(), "silver casio calculator with initials", "Library", "2025-03-10", "Electronics"))
+    system.report_lost_items_bulk([{"description": "red folding umbrella with strap", "location": "Gym",
+                                    "found_date": "2025-03-11", "category": "Accessories"}])
+    assert metrics.counters["items_reported"] == 4
+    assert metrics.histograms["report_lost_item"].count == 2
+    assert metrics.histograms["add_item"].count == 3
@@ -0,0 +1,67 @@
+import random
+import pytest
+import search_index
+from lost_and_found_system import Item
+from search_index import SearchIndex
+
+WORDS = "blue red black wallet phone iphone case bag backpack umbrella hydro flask bottle keys keychain jacket".split()
+TERMS = ["", "b", "bl", "ack", "blue", "blue wal", "lue black", "e b", "hydro flask", "xyz", " ", "keychain jacket"]
+
+
+class Entry:
+    def __init__(self, item_id, description):
+        self.item_id = item_id
+        self.description = description
+
+
+def scan(descriptions, term):
+    return [item_id for item_id, description in descriptions.items() if term in description]
+
+
+def test_search_matches_substring_scan_through_churn(monkeypatch):
+    # A low threshold makes removals renumber the rows many times over
+    monkeypatch.setattr(search_index, "MIN_COMPACT_ROWS", 20)
+    rng = random.Random(2)
+    index = SearchIndex()
+    descriptions = {}
+    for step in range(4000):
+        if descriptions and rng.random() < 0.5:
+            item_id = rng.choice(list(descriptions))
+            del descriptions[item_id]
+            index.remove(item_id)
+        else:
+            item_id = str(rng.randrange(400))
+            description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+            # Re-adding an item moves it to the end, as in the index
+            descriptions.pop(item_id, None)
+            descriptions[item_id] = description
+            index.add(Entry(item_id, description))
+        if step % 250 == 0:
+            for term in TERMS:
+                assert index.search_ids(term) == scan(descriptions, term), term
+    assert len(index) == len(descriptions)
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"category_filter": "Electronics"},
+    {"date_filter": "2025-03-14"},
+    {"start_date": "2025-02-01", "end_date": "2025-05-01"},
+    {"category_filter": "Others", "start_date": "2025-04-01"},
+])
+def test_system_search_matches_substring_scan(open_system, filters):
+    system = open_system()
+    rng = random.Random(1)
+    for index in range(300):
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 7)))
+        system.add_item(Item(str(1000 + index), description.capitalize(), "Library",
+                             f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}", rng.choice(["Electronics", "Others"])))
+    for item in rng.sample(list(system.items.values()), 80):
+        system.mark_claimed(item)
+
+    for term in TERMS:
+        expected = [item.item_id for item in system.items.values()
+                    if not item.claimed and term in item.description.lower()
+                    and system.matches_filters(item, filters.get("category_filter"), filters.get("date_filter"),
+                                               filters.get("start_date"), filters.get("end_date"))]
+        assert system.search_item_ids(term, **filters) == expected, term
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+import pytest
+from service import LostAndFoundService, ServiceClient, ServiceError
+
+WRITERS = 8
+REPORTS_PER_WRITER = 25
+
+
+@pytest.fixture
+def service(open_system, request):
+    # The service runs on its own event loop thread, as serve() would in its own process.
+    # Tests parametrize it indirectly to pass other service arguments
+    loop = asyncio.new_event_loop()
+    service = LostAndFoundService(open_system(), batch_window=0.01, login_delay=0, **getattr(request, "param", {}))
+    server = loop.run_until_complete(service.start("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    # The claim sweeper's first run is a group commit of its own; let it finish before counting groups
+    while not service.version:
+        time.sleep(0.01)
+    yield service, server.sockets[0].getsockname()[1]
+    asyncio.run_coroutine_threadsafe(service.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_concurrent_writes_share_group_commits(service, open_system):
+    service, port = service
+    version = service.version
+    errors = []
+
+    def writer(number):
+        client = ServiceClient(port=port)
+        try:
+            for index in range(REPORTS_PER_WRITER):
+                message = client.report_lost_item(f"writer {number} report {index} backpack", "Hall", "2025-03-01", "Bags")
+                if not message.startswith("Item reported successfully"):
+                    errors.append(message)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=writer, args=(number,)) for number in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    writes = WRITERS * REPORTS_PER_WRITER
+    assert not errors
+    # Each group commit bumps the version once, so fewer groups than writes means writes were batched
+    assert service.version - version < writes
+    # Every write was durable before it was answered
+    assert len(open_system().items) == writes
+
+
+def test_failed_write_does_not_fail_its_group(service):
+    service, port = service
+    # Both requests are pipelined on one connection, so they land in the same group commit
+    requests = [
+        {"id": 1, "op": "add_item", "args": {"item": {"item_id": "1"}}},
+        {"id": 2, "op": "report_lost_item", "args": {"description": "black leather wallet with cards", "location": "Gym",
+                                                     "found_date": "2025-03-01", "category": "Accessories"}},
+    ]
+    version = service.version
+    with socket.create_connection(("127.0.0.1", port)) as connection:
+        connection.sendall("".join(json.dumps(request) + "\n" for request in requests).encode())
+        with connection.makefile("rb") as responses:
+            results = {response["id"]: response for response in (json.loads(responses.readline()) for _ in requests)}
+
+    assert service.version == version + 1
+    assert not results[1]["ok"]
+    assert results[2]["ok"] and results[2]["result"].startswith("Item reported successfully")
+
+
+def test_admin_operations_need_login(service):
+    service, port = service
+    client = ServiceClient(port=port)
+    try:
+        with pytest.raises(ServiceError):
+            client.list_claim_codes()
+        assert not client.check_admin_password("wrong")
+        with pytest.raises(ServiceError):
+            client.archive_old_claims()
+        assert client.check_admin_password("admin123")
+        assert client.list_claim_codes() == []
+    finally:
+        client.close()
+
+
+def test_version_tracks_changes_for_clients(service):
+    service, port = service
+    client = ServiceClient(port=port)
+    try:
+        assert client.sync() is False
+        client.report_lost_item("blue umbrella with a wooden handle", "Gym", "2025-03-01", "Accessories")
+        assert client.sync() is True
+        assert client.sync() is False
+    finally:
+        client.close()
+
+
+def test_requests_longer_than_stream_default_are_served(service):
+    service, port = service
+    records = [{"description": f"black leather wallet number {n} with cards and an id inside", "location": "Library",
+                "found_date": "2025-03-01", "category": "Accessories"} for n in range(1000)]
+    # Well past the 64 KiB that asyncio streams accept by default
+    assert len(json.dumps(records)) > 64 * 1024
+    client = ServiceClient(port=port)
+    try:
+        result = client.report_lost_items_bulk(records)
+    finally:
+        client.close()
+    assert len(result["added"]) == 1000 and not result["errors"]
+
+
+@pytest.mark.parametrize("service", [{"max_request_bytes": 4096}], indirect=True)
+def test_request_over_the_limit_is_refused(service):
+    service, port = service
+    with socket.create_connection(("127.0.0.1", port)) as connection:
+        connection.sendall((json.dumps({"id": 1, "op": "version", "args": {"padding": "x" * 8192}}) + "\n").encode())
+        with connection.makefile("rb") as responses:
+            response = json.loads(responses.readline())
+            assert responses.readline() == b""
+    assert not response["ok"] and "longer than 4096 bytes" in response["error"]
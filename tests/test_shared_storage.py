@@ -0,0 +1,58 @@
+import threading
+from lost_and_found_system import CLAIM_SUCCESS
+
+
+def test_sync_picks_up_other_kiosks_changes(open_kiosk, report):
+    first, second = open_kiosk(), open_kiosk()
+    item_id = report(first, "black leather wallet with cards")
+    assert second.sync()
+    assert second.get_item(item_id).description == "black leather wallet with cards"
+    assert not second.sync()
+
+
+def test_reports_from_two_kiosks_get_distinct_ids(open_kiosk, report):
+    first, second = open_kiosk(), open_kiosk()
+    # Neither has seen the other's report when it allocates an ID
+    first_id = report(first, "black leather wallet with cards")
+    second_id = report(second, "blue umbrella with a wooden handle")
+    first.save_data()
+    assert first_id != second_id
+
+    descriptions = {item.description for item in open_kiosk().items.values()}
+    assert descriptions == {"black leather wallet with cards", "blue umbrella with a wooden handle"}
+
+
+def test_racing_claims_on_one_code_collect_it_once(open_kiosk, report):
+    first, second = open_kiosk(), open_kiosk()
+    item_id = report(first, "black leather wallet with cards")
+    claim_code = first.verify_ownership_description(item_id, "black leather wallet with cards", "Ana", "0917")["claim_code"]
+    second.sync()
+
+    barrier = threading.Barrier(2)
+    results = []
+
+    def claim(kiosk):
+        barrier.wait()
+        results.append(kiosk.claim_item(claim_code))
+
+    threads = [threading.Thread(target=claim, args=(kiosk,)) for kiosk in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(CLAIM_SUCCESS) == 1
+    fresh = open_kiosk()
+    assert fresh.get_item(item_id).claimed
+    assert fresh.get_claimant(claim_code).state == "collected"
+
+
+def test_claim_refused_after_another_kiosk_collected(open_kiosk, report):
+    first, second = open_kiosk(), open_kiosk()
+    item_id = report(first, "black leather wallet with cards")
+    claim_code = first.verify_ownership_description(item_id, "black leather wallet with cards", "Ana", "0917")["claim_code"]
+    second.sync()
+    assert first.claim_item(claim_code) == CLAIM_SUCCESS
+    # second has not synced, so only the lock-protected commit can catch the conflict
+    assert second.claim_item(claim_code) != CLAIM_SUCCESS
+    assert second.get_claimant(claim_code).state == "collected"